@@ -1,59 +1,241 @@
+"""Replay a solve recorded in a utils.Trace on the Sudoku board
+
+The 81 squares are built once, and each frame only redraws the squares whose
+digit changed since the last frame (over the matching patch of background),
+so the cost of a frame does not depend on the size of the board. A replay can
+fast-forward by applying several assignments per frame:
+
+    play(values, trace)                   a window at 5 frames per second;
+                                          Right/Left double/halve the number
+                                          of assignments per frame
+    render(values, trace, "solve.gif")    headless, with the SDL dummy video
+                                          driver: a GIF (needs Pillow), or
+                                          one image per frame in a directory
+
+    python PySudoku.py '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3' \\
+        -o frames/ --speed 4
+"""
+import argparse
 import sys, os, random, pygame
-sys.path.append(os.path.join("objects"))
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, "objects"))
 import SudokuSquare
 from utils import *
 from GameResources import *
 
 
-def play(values, result, history):
-    assignments = reconstruct(result, history)
-    pygame.init()
+SIZE = 700, 700
+SQUARE = 45, 40
+
+
+def square_position(x, y):
+    """Return the top-left pixel of the square in column x and row y """
+    return x * 57 + (38, 99, 159)[x // 3], y * 57 + (35, 100, 165)[y // 3]
+
+
+def _number(value):
+    return int(value) if len(value) == 1 and value != '.' else None
+
+
+class Board:
+    """The squares of a board on a screen, redrawn only where they change
+
+    Attributes
+    ----------
+    values : dict
+        the board being shown, in the form {'box_name': '123456789', ...}
+
+    steps : int
+        the number of assignments applied so far
+    """
+    def __init__(self, screen, values):
+        """
+        Parameters
+        ----------
+        screen(pygame.Surface)
+            the display surface the squares draw on
+
+        values(dict)
+            the starting board; it is updated in place as assignments are applied
+        """
+        self.screen = screen
+        self.values = values
+        self.steps = 0
+        self.background = pygame.image.load(os.path.join(HERE, "images", "sudoku-board-bare.jpg")).convert()
+        self.squares = {}
+        for y, r in enumerate(rows):
+            for x, c in enumerate(cols):
+                startX, startY = square_position(x, y)
+                self.squares[r + c] = SudokuSquare.SudokuSquare(_number(values[r + c]), startX, startY, "N", x, y)
+        self.dirty = set()
+        self.screen.blit(self.background, (0, 0))
+        for square in self.squares.values():
+            square.draw()
+
+    def apply(self, box, value):
+        """Assign `value` to `box`, marking its square for the next redraw if its digit changed """
+        self.steps += 1
+        shown = _number(self.values[box])
+        self.values[box] = value
+        if _number(value) != shown:
+            self.squares[box].set_number(_number(value))
+            self.dirty.add(box)
+
+    def advance(self, assignments, count=1):
+        """Apply up to `count` assignments from an iterator of (box, value) pairs
+
+        Returns
+        -------
+        bool
+            False once the iterator is exhausted
+        """
+        for _ in range(count):
+            step = next(assignments, None)
+            if step is None:
+                return False
+            self.apply(*step)
+        return True
+
+    def redraw(self):
+        """Redraw the squares that changed since the last redraw
+
+        Returns
+        -------
+        list
+            the pygame.Rect of every redrawn square, for pygame.display.update
+        """
+        rects = []
+        for box in self.dirty:
+            square = self.squares[box]
+            rect = pygame.Rect((square.offsetX, square.offsetY), SQUARE)
+            self.screen.blit(self.background, rect, rect)
+            square.draw()
+            rects.append(rect)
+        self.dirty.clear()
+        return rects
 
-    size = width, height = 700, 700
-    screen = pygame.display.set_mode(size)
 
-    background_image = pygame.image.load("./images/sudoku-board-bare.jpg").convert()
+def play(values, trace, fps=5, speed=1):
+    """Replay the assignments recorded in a utils.Trace on the starting board `values`
 
+    Parameters
+    ----------
+    fps(int)
+        frames per second (0 for as fast as possible)
+
+    speed(int)
+        assignments applied per frame; Right and Left double and halve it
+        during the replay
+    """
+    assignments = iter(trace)
+    pygame.init()
+    screen = pygame.display.set_mode(SIZE)
+    board = Board(screen, values)
+    pygame.display.flip()
     clock = pygame.time.Clock()
 
-    while True:
-        pygame.event.pump()
-        theSquares = []
-        initXLoc = 0
-        initYLoc = 0
-        startX, startY, editable, number = 0, 0, "N", 0
-        for y in range(9):
-            for x in range(9):
-                if x in (0, 1, 2):  startX = (x * 57) + 38
-                if x in (3, 4, 5):  startX = (x * 57) + 99
-                if x in (6, 7, 8):  startX = (x * 57) + 159
-
-                if y in (0, 1, 2):  startY = (y * 57) + 35
-                if y in (3, 4, 5):  startY = (y * 57) + 100
-                if y in (6, 7, 8):  startY = (y * 57) + 165
-                string_number = values[rows[y] + cols[x]]
-                if len(string_number) > 1 or string_number == '' or string_number == '.':
-                    number = None
-                else:
-                    number = int(string_number)
-                theSquares.append(SudokuSquare.SudokuSquare(number, startX, startY, editable, x, y))
-
-        screen.blit(background_image, (0, 0))
-        for num in theSquares:
-            num.draw()
-
-        pygame.display.flip()
-        pygame.display.update()
-        clock.tick(5)
-
-        if len(assignments) == 0:
-            break
-        box, value = assignments.pop()
-        values[box] = value
-
-    # leave game showing until closed by user
+    running = True
     while True:
         for event in pygame.event.get():
-            if event.type == pygame.QUIT:
+            if event.type == pygame.QUIT or event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
                 pygame.quit()
-                quit()
+                return
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_RIGHT:
+                speed *= 2
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_LEFT:
+                speed = max(1, speed // 2)
+        if running:
+            running = board.advance(assignments, speed)
+            pygame.display.update(board.redraw())
+        # leave the board showing until the window is closed
+        clock.tick(fps if running else 10)
+
+
+def render(values, trace, output, fps=5, speed=1, frame_format="png"):
+    """Replay a trace without a window and save the frames
+
+    The SDL dummy video driver is used unless SDL_VIDEODRIVER is already set.
+
+    Parameters
+    ----------
+    values(dict), trace(Trace)
+        the starting board and the assignments to replay (see play)
+
+    output(str)
+        a .gif file to write an animation to (requires Pillow), or a
+        directory to write one image per frame to
+
+    fps(int)
+        frames per second of the GIF
+
+    speed(int)
+        assignments applied per frame
+
+    frame_format(str)
+        the image format of the frames written to a directory, e.g. "png",
+        or "bmp" to skip compressing them (much faster for long traces)
+
+    Returns
+    -------
+    int
+        the number of frames written; the first shows the starting board and
+        the last the end of the trace
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    gif = output.lower().endswith(".gif")
+    if gif:
+        try:
+            from PIL import Image
+        except ImportError:
+            raise ImportError("Writing a GIF requires Pillow; pass a directory to write PNG frames instead")
+    else:
+        os.makedirs(output, exist_ok=True)
+    assignments = iter(trace)
+    pygame.init()
+    try:
+        screen = pygame.display.set_mode(SIZE)
+        board = Board(screen, values)
+        images = []
+        running = True
+        while True:
+            if gif:
+                images.append(Image.frombytes("RGB", SIZE, pygame.image.tostring(screen, "RGB")))
+            else:
+                pygame.image.save(screen, os.path.join(output, "frame_{:05d}.{}".format(len(images), frame_format)))
+                images.append(None)
+            if not running:
+                break
+            running = board.advance(assignments, speed)
+            if not board.redraw() and not running:
+                break
+    finally:
+        pygame.quit()
+    if gif:
+        images[0].save(output, save_all=True, append_images=images[1:], duration=1000 // max(1, fps), loop=0)
+    return len(images)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve a diagonal Sudoku puzzle and replay the solve.")
+    parser.add_argument('grid', help="The puzzle as an 81-character grid string")
+    parser.add_argument('-o', '--output', default=None,
+                        help="Render without a window to this .gif file or frame directory")
+    parser.add_argument('-s', '--speed', type=int, default=1, help="Assignments applied per frame")
+    parser.add_argument('-f', '--fps', type=int, default=5, help="Frames per second")
+    parser.add_argument('--format', default='png', help="Image format of the frames written to a directory")
+    args = parser.parse_args(argv)
+
+    import solution
+    trace = Trace()
+    if not solution.solve(args.grid, engine="bitmask", trace=trace):
+        print("No solution", file=sys.stderr)
+    if args.output is None:
+        play(grid2values(args.grid), trace, args.fps, args.speed)
+    else:
+        count = render(grid2values(args.grid), trace, args.output, args.fps, args.speed, args.format)
+        print("Wrote {} frames of {} assignments".format(count, len(trace)), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Solve batches of Sudoku puzzles across a process pool
+
+Reads puzzles from a file with one 81-character grid string per line, solves
+them in parallel worker processes and writes one line per puzzle, in input
+order: the solved grid, or an empty line if the puzzle has no solution.
+
+    python batch.py puzzles.txt -o solved.txt --workers 8 --chunksize 256
+"""
+import argparse
+import sys
+
+from functools import partial
+from itertools import islice
+from multiprocessing import Pool
+from timeit import default_timer as timer
+
+import solution
+from utils import values2grid
+
+
+def solve_grid(grid, engine="bitmask", **options):
+    """Solve one grid string and return the solution as a grid string
+
+    Each call only touches state local to the solve, so it is safe to run in
+    any number of worker processes.
+
+    Returns
+    -------
+    str or None
+        The solved grid in values2grid format, or None if no solution exists.
+    """
+    values = solution.solve(grid, engine=engine, **options)
+    if not values:
+        return None
+    return values2grid(values)
+
+
+def solve_chunk(grids, **options):
+    """Solve a list of grid strings with the NumPy batch engine (see vectorized.py)
+
+    Returns
+    -------
+    list
+        The solved grid string for each input grid, or None where no solution exists.
+    """
+    import vectorized
+    return vectorized.solve_batch(grids, solution.tables, **options)
+
+
+def chunked(iterable, size):
+    """Yield lists of up to `size` consecutive items from an iterable """
+    iterator = iter(iterable)
+    chunk = list(islice(iterator, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(iterator, size))
+
+
+def solve_many(grids, workers=None, chunksize=64, engine="bitmask", **options):
+    """Solve an iterable of grid strings in parallel worker processes
+
+    Parameters
+    ----------
+    grids(iterable)
+        grid strings; the iterable is consumed lazily, so it can stream from a file
+
+    workers(int)
+        number of worker processes (defaults to the number of CPUs); with 1
+        worker the puzzles are solved in the calling process
+
+    chunksize(int)
+        number of puzzles sent to a worker at a time
+
+    engine(str), options
+        passed through to solution.solve; the "vectorized" engine instead
+        propagates each chunk of puzzles as one NumPy batch (requires numpy)
+
+    Yields
+    ------
+    str or None
+        The solved grid string for each input grid, in input order, or None
+        for puzzles without a solution
+    """
+    if engine == "vectorized":
+        chunks = _imap(partial(solve_chunk, **options), chunked(grids, chunksize), workers, 1)
+        for results in chunks:
+            yield from results
+    else:
+        yield from _imap(partial(solve_grid, engine=engine, **options), grids, workers, chunksize)
+
+
+def _imap(function, iterable, workers, chunksize):
+    if workers == 1:
+        yield from map(function, iterable)
+        return
+    with Pool(workers) as pool:
+        yield from pool.imap(function, iterable, chunksize)
+
+
+def read_grids(lines):
+    """Yield the grid strings from an iterable of lines, skipping blank lines
+    and lines that start with '#'
+    """
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith('#'):
+            yield line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve a file of Sudoku puzzles " +
+        "(one 81-character grid per line) in parallel worker processes.")
+    parser.add_argument('puzzles', help="File of puzzles to solve, or - for stdin")
+    parser.add_argument('-o', '--output', default='-',
+                        help="File to write the solved grids to (default: stdout)")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Number of worker processes (default: number of CPUs)")
+    parser.add_argument('-c', '--chunksize', type=int, default=64,
+                        help="Number of puzzles sent to a worker at a time")
+    parser.add_argument('-e', '--engine', choices=['bitmask', 'strings', 'vectorized'], default='bitmask',
+                        help="Solver engine to use")
+    args = parser.parse_args(argv)
+
+    infile = sys.stdin if args.puzzles == '-' else open(args.puzzles)
+    outfile = sys.stdout if args.output == '-' else open(args.output, 'w')
+    count = unsolved = 0
+    start = timer()
+    try:
+        for result in solve_many(read_grids(infile), args.workers, args.chunksize, args.engine):
+            outfile.write((result or '') + '\n')
+            count += 1
+            unsolved += result is None
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+    elapsed = timer() - start
+    print("Solved {} puzzles ({} without solution) in {:.3f} seconds: {:.1f} puzzles/second".format(
+        count, unsolved, elapsed, count / elapsed if elapsed else 0.0), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
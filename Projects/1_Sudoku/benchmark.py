@@ -0,0 +1,271 @@
+"""Benchmark the Sudoku solving modes on fixed puzzle corpora
+
+The corpora in benchmarks/ are diagonal Sudoku puzzles checked into the repo,
+one 81-character grid per line:
+
+    easy.txt         unique puzzles that propagation solves without search
+    hard.txt         unique minimal puzzles that need a few search levels
+    adversarial.txt  the minimal puzzles that needed the most search nodes,
+                     and puzzles without a solution, which force the search
+                     to exhaust its whole tree
+
+Every puzzle of every corpus is solved with every mode in MODES (the strings
+engine only when it is selected with -m, because it takes minutes on the hard
+corpora where the other modes take seconds). The results hold solve time
+percentiles, the search counters of the bitmask engine (see
+bitmask.SearchStats) and the peak memory of a solve, and are printed as JSON.
+They are compared against a saved baseline, and the command exits with status
+1 when any metric regressed by more than the tolerance.
+
+    python benchmark.py                      # run and compare against the baseline
+    python benchmark.py --save               # run and replace the baseline
+    python benchmark.py -m bitmask-queue dlx -c hard --repeat 5 -o results.json
+    python benchmark.py -m bitmask-queue -O mrv-degree   # try another ordering policy
+
+Timings depend on the machine, so save a baseline on the machine that runs
+the comparison; the search counters are deterministic.
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tracemalloc
+
+from collections import OrderedDict
+from timeit import default_timer as timer
+
+import bitmask
+import solution
+from batch import read_grids
+from ordering import POLICIES
+
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks')
+CORPORA = ['easy', 'hard', 'adversarial']
+BASELINE = os.path.join(CORPUS_DIR, 'baseline.json')
+
+# mode name -> (engine, options passed to solution.solve)
+MODES = OrderedDict([
+    ("strings", ("strings", {})),
+    ("bitmask-sweep", ("bitmask", {})),
+    ("bitmask-queue", ("bitmask", {"propagation": "queue"})),
+    ("bitmask-inplace", ("bitmask", {"inplace": True})),
+    ("bitmask-strategies", ("bitmask", {"propagation": "queue",
+                                        "strategies": ["naked_pairs", "hidden_pairs", "pointing"]})),
+    ("bitmask-degree-lcv", ("bitmask", {"propagation": "queue", "ordering": "mrv-degree-lcv"})),
+    ("bitmask-restarts", ("bitmask", {"propagation": "queue", "ordering": "restarts"})),
+    ("dlx", ("dlx", {})),
+])
+
+DEFAULT_MODES = [mode for mode in MODES if mode != "strings"]
+
+COUNTERS = ["nodes", "backtracks", "propagations", "restarts"]
+
+# time differences below this many milliseconds are scheduler noise, not regressions
+TIME_FLOOR_MS = 1.0
+
+
+def load_corpus(name):
+    """Return the list of grid strings in a corpus of benchmarks/ """
+    with open(os.path.join(CORPUS_DIR, name + '.txt')) as f:
+        return list(read_grids(f))
+
+
+def percentile(values, q):
+    """Return the q-th percentile (0-100) of a sorted list, interpolating
+    linearly between the closest ranks
+    """
+    if not values:
+        return 0.0
+    position = (len(values) - 1) * q / 100.0
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def _solve(grid, engine, options, stats):
+    if engine == "bitmask":
+        return solution.solve(grid, engine=engine, stats=stats, **options)
+    return solution.solve(grid, engine=engine, **options)
+
+
+def run_mode(grids, mode, repeat=1, ordering=None):
+    """Solve every grid with one mode and summarize the measurements
+
+    Parameters
+    ----------
+    grids(list)
+        the grid strings to solve
+
+    mode(str)
+        a key of MODES
+
+    repeat(int)
+        number of times each grid is solved; the fastest time is kept
+
+    ordering(str)
+        the name of an ordering policy (see ordering.POLICIES) that replaces
+        the one of a bitmask mode
+
+    Returns
+    -------
+    dict
+        the ordering policy of the search ("mrv" is the default, None for
+        engines without one), "puzzles" and "solved" counts, solve time
+        percentiles in milliseconds under "time_ms", the totals of the search
+        counters (None for engines without them) and the largest peak memory
+        of a solve in KiB
+    """
+    engine, options = MODES[mode]
+    if engine == "bitmask" and ordering is not None:
+        options = dict(options, ordering=ordering)
+    times = []
+    solved = 0
+    stats = bitmask.SearchStats()
+    for grid in grids:
+        best = None
+        for attempt in range(repeat):
+            counters = stats if attempt == 0 else bitmask.SearchStats()
+            start = timer()
+            result = _solve(grid, engine, options, counters)
+            elapsed = timer() - start
+            best = elapsed if best is None else min(best, elapsed)
+        times.append(best * 1000.0)
+        solved += bool(result)
+
+    # tracemalloc slows allocation down, so memory is measured in its own pass;
+    # tracing restarts for every grid to reset the peak (reset_peak() needs 3.9)
+    peak = 0
+    try:
+        for grid in grids:
+            tracemalloc.start()
+            _solve(grid, engine, options, bitmask.SearchStats())
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+    finally:
+        tracemalloc.stop()
+
+    times.sort()
+    summary = OrderedDict([
+        ("ordering", options.get("ordering", "mrv") if engine == "bitmask" else None),
+        ("puzzles", len(grids)),
+        ("solved", solved),
+    ])
+    summary["time_ms"] = OrderedDict([
+        ("p50", percentile(times, 50)),
+        ("p90", percentile(times, 90)),
+        ("p99", percentile(times, 99)),
+        ("max", times[-1] if times else 0.0),
+        ("total", sum(times)),
+    ])
+    for name in COUNTERS:
+        summary[name] = getattr(stats, name) if engine == "bitmask" else None
+    summary["peak_memory_kib"] = peak / 1024.0
+    return summary
+
+
+def run(modes=None, corpora=None, repeat=1, ordering=None):
+    """Run every mode on every corpus and return the results as a dict """
+    modes = DEFAULT_MODES if modes is None else modes
+    corpora = CORPORA if corpora is None else corpora
+    grids = {name: load_corpus(name) for name in corpora}
+    results = OrderedDict([
+        ("python", platform.python_version()),
+        ("machine", platform.machine()),
+        ("repeat", repeat),
+        ("modes", OrderedDict()),
+    ])
+    for mode in modes:
+        results["modes"][mode] = OrderedDict((name, run_mode(grids[name], mode, repeat, ordering))
+                                             for name in corpora)
+    return results
+
+
+def compare(results, baseline, tolerance=0.25):
+    """Compare benchmark results against a baseline
+
+    Only the modes and corpora present in both, and run with the same
+    ordering policy, are compared. A change in the number of solved puzzles is
+    always a regression; time percentiles, search counters and peak memory
+    regress when they grow by more than `tolerance` (a fraction of the
+    baseline value), and times also by more than TIME_FLOOR_MS.
+
+    Returns
+    -------
+    list
+        A description of every regression (empty if none)
+    """
+    regressions = []
+    for mode, corpora in results["modes"].items():
+        for name, current in corpora.items():
+            previous = baseline.get("modes", {}).get(mode, {}).get(name)
+            if previous is None:
+                continue
+            where = "{}/{}".format(mode, name)
+            if current.get("ordering") != previous.get("ordering"):
+                continue
+            if current["solved"] != previous["solved"]:
+                regressions.append("{}: solved {} puzzles, baseline solved {}".format(
+                    where, current["solved"], previous["solved"]))
+            metrics = [("time_ms." + key, current["time_ms"][key], previous["time_ms"][key], TIME_FLOOR_MS)
+                       for key in ("p50", "p90", "p99")]
+            metrics += [(key, current.get(key), previous.get(key), 0) for key in COUNTERS + ["peak_memory_kib"]]
+            for metric, now, then, floor in metrics:
+                if now is None or then is None:
+                    continue
+                if now > then * (1 + tolerance) and now - then > floor:
+                    regressions.append("{}: {} is {:.4g}, baseline {:.4g} ({:+.0%})".format(
+                        where, metric, now, then, (now - then) / then if then else float('inf')))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Sudoku solving modes on the corpora " +
+        "in benchmarks/ and compare the results against a saved baseline.")
+    parser.add_argument('-m', '--modes', nargs='+', choices=list(MODES), default=None,
+                        help="Modes to run (default: all but strings)")
+    parser.add_argument('-c', '--corpora', nargs='+', choices=CORPORA, default=None,
+                        help="Corpora to run (default: all)")
+    parser.add_argument('-O', '--ordering', choices=sorted(POLICIES), default=None,
+                        help="Ordering policy for every bitmask mode (default: each mode's own)")
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help="Number of times each puzzle is solved; the fastest time is kept")
+    parser.add_argument('-o', '--output', default='-',
+                        help="File to write the JSON results to (default: stdout)")
+    parser.add_argument('-b', '--baseline', default=BASELINE,
+                        help="Baseline JSON file to compare against (default: benchmarks/baseline.json)")
+    parser.add_argument('-t', '--tolerance', type=float, default=0.25,
+                        help="Allowed relative growth of a metric before it counts as a regression")
+    parser.add_argument('--save', action='store_true',
+                        help="Write the results to the baseline file instead of comparing")
+    args = parser.parse_args(argv)
+
+    results = run(args.modes, args.corpora, args.repeat, args.ordering)
+    text = json.dumps(results, indent=2)
+    if args.output == '-':
+        print(text)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            f.write(text + '\n')
+        print("Saved the baseline to {}".format(args.baseline), file=sys.stderr)
+        return 0
+    if not os.path.exists(args.baseline):
+        print("No baseline at {}; run with --save to create one".format(args.baseline), file=sys.stderr)
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    for line in regressions:
+        print("REGRESSION " + line, file=sys.stderr)
+    if not regressions:
+        print("No regressions against {}".format(args.baseline), file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
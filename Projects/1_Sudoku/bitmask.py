@@ -0,0 +1,705 @@
+"""Bitmask candidate engine for the Sudoku solver
+
+The string engine in solution.py stores each box as a string of candidate
+digits. This module stores a board as a flat list with one small int per box,
+where bit k is set when the k-th digit is still a candidate for the box, and
+replaces the box-name lookups with integer unit and peer index tables.
+"""
+from itertools import islice
+
+
+class IndexTables:
+    """Integer unit and peer tables for a board layout
+
+    Attributes
+    ----------
+    boxes : list
+        the box names in board order; a box is identified by its index here
+
+    index : dict
+        a mapping from box name to box index
+
+    digits : str
+        the candidate symbols; bit k of a candidate mask stands for digits[k]
+
+    full : int
+        the candidate mask with every digit set
+
+    units : list
+        a list of tuples holding the box indices of each unit in the unitlist
+
+    box_units : list
+        box_units[i] is a tuple of the positions in `units` of the units that
+        contain box i
+
+    peers : list
+        peers[i] is a tuple of the box indices that must hold a different
+        digit from box i (the boxes that share a unit with it, on most boards)
+
+    strategies : list or None
+        the names of the strategies (see strategies.py) that the board needs
+        on top of the unit and peer rules, e.g. the cage sums of killer
+        boards; the bitmask search always runs them
+    """
+    def __init__(self, boxes, unitlist, peers, digits='123456789'):
+        """
+        Parameters
+        ----------
+        boxes(list)
+            a list of strings identifying each box on a sudoku board (e.g., "A1", "C7", etc.)
+
+        unitlist(list)
+            a list containing "units" (rows, columns, diagonals, etc.) of boxes
+
+        peers(dict)
+            a dictionary with a key for each box whose value is a collection of
+            the boxes that are peers of the key box
+
+        digits(str)
+            the symbols that can be placed in a box
+        """
+        index = {box: i for i, box in enumerate(boxes)}
+        self._build(boxes, [tuple(index[box] for box in unit) for unit in unitlist],
+                    [tuple(sorted(index[p] for p in peers[box])) for box in boxes], digits)
+
+    def _build(self, boxes, units, peers, digits):
+        self.boxes = list(boxes)
+        self.index = {box: i for i, box in enumerate(self.boxes)}
+        self.digits = digits
+        self.full = (1 << len(digits)) - 1
+        self.bits = {d: 1 << k for k, d in enumerate(digits)}
+        self.units = units
+        self.peers = peers
+        self.strategies = None
+        box_units = [[] for _ in self.boxes]
+        for u, unit in enumerate(self.units):
+            for i in unit:
+                box_units[i].append(u)
+        self.box_units = [tuple(us) for us in box_units]
+
+    def grid2masks(self, grid):
+        """Convert a grid string into a list of candidate masks ('.' is unknown) """
+        full, bits = self.full, self.bits
+        return [full if c == '.' else bits[c] for c in grid]
+
+    def masks2values(self, masks):
+        """Convert a list of candidate masks into the dictionary board representation """
+        digits = self.digits
+        return {box: ''.join(d for k, d in enumerate(digits) if m >> k & 1)
+                for box, m in zip(self.boxes, masks)}
+
+    def masks2grid(self, masks):
+        """Convert a list of candidate masks into a grid string ('.' for unsolved boxes) """
+        digits = self.digits
+        return ''.join(digits[m.bit_length() - 1] if m and m & (m - 1) == 0 else '.'
+                       for m in masks)
+
+    def values2masks(self, values):
+        """Convert the dictionary board representation into a list of candidate masks """
+        bits = self.bits
+        masks = []
+        for box in self.boxes:
+            m = 0
+            for d in values[box]:
+                m |= bits[d]
+            masks.append(m)
+        return masks
+
+
+def popcount(mask):
+    """Count the candidates in a mask """
+    return bin(mask).count('1')
+
+
+def eliminate(masks, tables):
+    """Remove the digit of every solved box from the candidates of its peers
+
+    Parameters
+    ----------
+    masks(list)
+        a list of candidate masks, one per box
+
+    tables(IndexTables)
+        the index tables for the board layout
+
+    Returns
+    -------
+    list
+        The masks list with the assigned values eliminated from peers
+    """
+    peers = tables.peers
+    for i, m in enumerate(masks):
+        if m and m & (m - 1) == 0:
+            keep = ~m
+            for p in peers[i]:
+                masks[p] &= keep
+    return masks
+
+
+def only_choice(masks, tables):
+    """Assign every digit that fits in only one box of a unit to that box
+
+    A box that is the only place in a unit for two different digits can hold
+    neither, so its mask is cleared to flag the contradiction.
+
+    Parameters
+    ----------
+    masks(list)
+        a list of candidate masks, one per box
+
+    tables(IndexTables)
+        the index tables for the board layout
+
+    Returns
+    -------
+    list
+        The masks list with all single-place digits assigned
+    """
+    for unit in tables.units:
+        once = twice = 0
+        for i in unit:
+            m = masks[i]
+            twice |= once & m
+            once |= m
+        unique = once & ~twice
+        if unique:
+            for i in unit:
+                m = masks[i] & unique
+                if m:
+                    masks[i] = m if m & (m - 1) == 0 else 0
+    return masks
+
+
+def reduce_puzzle(masks, tables, pipeline=None, trace=None, stats=None):
+    """Reduce a board by repeatedly applying eliminate and only_choice, and
+    the strategies of `pipeline` (see strategies.py) whenever those stall.
+    Boxes solved by a pass are recorded in `trace` (a utils.Trace) if given,
+    and every pass is counted in stats.propagations if `stats` is given.
+
+    Returns
+    -------
+    list or False
+        The masks list once the strategies stop making progress, or False if
+        a box runs out of candidates
+    """
+    stalled = False
+    while not stalled:
+        if stats is not None:
+            stats.propagations += 1
+        before = sum(1 for m in masks if m & (m - 1) == 0)
+        if trace is not None:
+            previous = masks[:]
+        eliminate(masks, tables)
+        only_choice(masks, tables)
+        if 0 in masks:
+            return False
+        if trace is not None:
+            for i, m in enumerate(masks):
+                if m != previous[i] and m & (m - 1) == 0:
+                    trace.append(i, m)
+        stalled = before == sum(1 for m in masks if m & (m - 1) == 0)
+        if stalled and pipeline is not None:
+            changed = pipeline.apply(masks, tables)
+            if changed is False:
+                return False
+            if trace is not None:
+                for i in changed:
+                    if masks[i] & (masks[i] - 1) == 0:
+                        trace.append(i, masks[i])
+            stalled = not changed
+    return masks
+
+
+def propagate(masks, tables, queue, dirty, trail=None, trace=None, stats=None):
+    """Propagate constraints incrementally from the boxes that changed
+
+    Solved boxes waiting in `queue` have their digit removed from their peers,
+    and only the units in `dirty` (the units that lost a candidate) are checked
+    for digits with a single place left. Every change feeds the queue and the
+    dirty set again until both are empty, so work is proportional to the number
+    of boxes touched instead of the size of the board.
+
+    Parameters
+    ----------
+    masks(list)
+        a list of candidate masks, one per box
+
+    tables(IndexTables)
+        the index tables for the board layout
+
+    queue(list)
+        indices of solved boxes whose digit has not been removed from their peers
+
+    dirty(iterable)
+        positions in tables.units of the units to check for single-place digits
+
+    trail(list)
+        if given, an (index, old mask) pair is appended for every change so the
+        changes can be rolled back with undo()
+
+    trace(Trace)
+        if given, every box solved by propagation is recorded in it
+
+    stats(SearchStats)
+        if given, every round (draining the queue, then checking the dirty
+        units) is counted in stats.propagations
+
+    Returns
+    -------
+    list or False
+        The masks list once nothing is left to propagate, or False as soon as
+        a box runs out of candidates or a digit has no place left in a unit
+    """
+    peers, units, box_units, full = tables.peers, tables.units, tables.box_units, tables.full
+    dirty = set(dirty)
+    while queue or dirty:
+        if stats is not None:
+            stats.propagations += 1
+        while queue:
+            i = queue.pop()
+            m = masks[i]
+            keep = ~m
+            for p in peers[i]:
+                pm = masks[p]
+                if pm & m:
+                    if trail is not None:
+                        trail.append((p, pm))
+                    pm &= keep
+                    masks[p] = pm
+                    if not pm:
+                        return False
+                    if pm & (pm - 1) == 0:
+                        queue.append(p)
+                        if trace is not None:
+                            trace.append(p, pm)
+                    dirty.update(box_units[p])
+        touched, dirty = dirty, set()
+        for u in touched:
+            unit = units[u]
+            once = twice = 0
+            for i in unit:
+                m = masks[i]
+                twice |= once & m
+                once |= m
+            if once != full:
+                return False
+            unique = once & ~twice
+            if not unique:
+                continue
+            for i in unit:
+                m = masks[i]
+                h = m & unique
+                if h and h != m:
+                    if h & (h - 1):
+                        return False
+                    if trail is not None:
+                        trail.append((i, m))
+                    masks[i] = h
+                    queue.append(i)
+                    if trace is not None:
+                        trace.append(i, h)
+                    dirty.update(box_units[i])
+    return masks
+
+
+def settle(masks, tables, pipeline, trail=None, trace=None, stats=None):
+    """Apply the strategies of `pipeline` and propagate their changes until
+    none of them makes progress; return False on a contradiction
+    """
+    box_units = tables.box_units
+    while True:
+        changed = pipeline.apply(masks, tables, trail)
+        if not changed:
+            return changed is not False
+        queue = [i for i in changed if masks[i] & (masks[i] - 1) == 0]
+        if trace is not None:
+            for i in queue:
+                trace.append(i, masks[i])
+        dirty = set()
+        for i in changed:
+            dirty.update(box_units[i])
+        if not propagate(masks, tables, queue, dirty, trail, trace, stats):
+            return False
+
+
+def undo(masks, trail, mark):
+    """Roll the masks back to the state they had when the trail was `mark` long """
+    while len(trail) > mark:
+        i, m = trail.pop()
+        masks[i] = m
+
+
+def _choose_box(masks):
+    """Return the index of the unsolved box with the fewest candidates (ties
+    are broken by board order, which matches the box-name ordering used by
+    solution.search), or None if every box is solved
+    """
+    best, box = None, None
+    for i, m in enumerate(masks):
+        if m & (m - 1):
+            n = popcount(m)
+            if best is None or n < best:
+                best, box = n, i
+                if n == 2:
+                    break
+    return box
+
+
+class SearchStats:
+    """Counters describing the work done by one or more searches
+
+    Attributes
+    ----------
+    nodes : int
+        number of candidate assignments tried while branching
+
+    backtracks : int
+        number of those assignments that led to a contradiction
+
+    propagations : int
+        number of propagation rounds: passes of reduce_puzzle over the whole
+        board, or rounds of propagate (see its `stats` parameter)
+
+    restarts : int
+        number of times a search hit its node cap and started over (see ordering.py)
+    """
+    def __init__(self):
+        self.nodes = 0
+        self.backtracks = 0
+        self.propagations = 0
+        self.restarts = 0
+
+    def as_dict(self):
+        return {"nodes": self.nodes, "backtracks": self.backtracks, "propagations": self.propagations,
+                "restarts": self.restarts}
+
+
+class _Restart(Exception):
+    """Raised when a search attempt uses up its node cap """
+
+
+def _bits(mask):
+    """Return the candidate bits of a mask in digit order """
+    bits = []
+    while mask:
+        bit = mask & -mask
+        mask ^= bit
+        bits.append(bit)
+    return bits
+
+
+class _Search:
+    """The options and counters shared by every node of one search """
+    def __init__(self, tables, pipeline, trace, stats, ordering=None):
+        self.tables = tables
+        self.pipeline = pipeline
+        self.trace = trace
+        self.stats = stats
+        self.ordering = ordering
+        self.rng = None if ordering is None else ordering.rng()
+        self.limit = None
+
+    def choose(self, masks):
+        """Return the box to branch on (see _choose_box and ordering.Ordering) """
+        if self.ordering is None:
+            return _choose_box(masks)
+        return self.ordering.choose(masks, self.tables, self.rng)
+
+    def _branches(self, masks, box):
+        """Yield each candidate bit of a box, rewinding the trace after each one
+
+        The generator is only resumed when the previous branch failed, so
+        every resumption is counted as a backtrack.
+        """
+        trace, stats, limit = self.trace, self.stats, self.limit
+        if self.ordering is None:
+            bits = _bits(masks[box])
+        else:
+            bits = self.ordering.values(masks, self.tables, box, self.rng)
+        for bit in bits:
+            stats.nodes += 1
+            if limit is not None and stats.nodes > limit:
+                raise _Restart()
+            if trace is None:
+                yield bit
+            else:
+                mark = trace.mark()
+                trace.append(box, bit)
+                yield bit
+                trace.rewind(mark)
+            stats.backtracks += 1
+
+    def sweep(self, masks):
+        masks = reduce_puzzle(masks, self.tables, self.pipeline, self.trace, self.stats)
+        if masks is False:
+            return False
+        box = self.choose(masks)
+        if box is None:
+            return masks
+        for bit in self._branches(masks, box):
+            attempt = masks[:]
+            attempt[box] = bit
+            attempt = self.sweep(attempt)
+            if attempt:
+                return attempt
+        return False
+
+    def settle(self, masks, trail=None):
+        return self.pipeline is None or settle(masks, self.tables, self.pipeline, trail, self.trace, self.stats)
+
+    def queue(self, masks):
+        box = self.choose(masks)
+        if box is None:
+            return masks
+        box_units = self.tables.box_units[box]
+        for bit in self._branches(masks, box):
+            attempt = masks[:]
+            attempt[box] = bit
+            if (propagate(attempt, self.tables, [box], box_units, None, self.trace, self.stats)
+                    and self.settle(attempt)):
+                attempt = self.queue(attempt)
+                if attempt:
+                    return attempt
+        return False
+
+    def start(self, masks):
+        """Propagate the givens of a board; return False on a contradiction """
+        solved = [i for i, m in enumerate(masks) if m and m & (m - 1) == 0]
+        if 0 in masks or not propagate(masks, self.tables, solved, range(len(self.tables.units)),
+                                       None, self.trace, self.stats):
+            return False
+        return self.settle(masks)
+
+    def inplace(self, masks, trail):
+        """Yield `masks` every time the search below it holds a solution
+
+        The masks are left solved while the caller holds a yielded solution,
+        and are restored from the trail when the generator is resumed.
+        """
+        box = self.choose(masks)
+        if box is None:
+            yield masks
+            return
+        box_units = self.tables.box_units[box]
+        for bit in self._branches(masks, box):
+            mark = len(trail)
+            trail.append((box, masks[box]))
+            masks[box] = bit
+            if (propagate(masks, self.tables, [box], box_units, trail, self.trace, self.stats)
+                    and self.settle(masks, trail)):
+                yield from self.inplace(masks, trail)
+            undo(masks, trail, mark)
+
+    def run(self, masks, propagation, inplace):
+        if propagation == "sweep" and not inplace:
+            return self.sweep(masks)
+        if not self.start(masks):
+            return False
+        if inplace:
+            return next(self.inplace(masks, []), False)
+        return self.queue(masks)
+
+    def restarts(self, masks, propagation, inplace):
+        """Run attempts on copies of the masks with a growing node cap until
+        one of them finishes
+        """
+        ordering, trace = self.ordering, self.trace
+        cap = ordering.node_cap
+        while True:
+            self.limit = self.stats.nodes + int(cap)
+            mark = None if trace is None else trace.mark()
+            try:
+                result = self.run(masks[:], propagation, inplace)
+            except _Restart:
+                self.stats.restarts += 1
+                if trace is not None:
+                    trace.rewind(mark)
+                cap *= ordering.growth
+                continue
+            if result and inplace:
+                masks[:] = result
+                return masks
+            return result
+
+
+def search(masks, tables, propagation="sweep", inplace=False, strategies=None, trace=None, stats=None,
+           ordering=None):
+    """Depth first search over candidate masks, branching on the unsolved box
+    with the fewest candidates (by default)
+
+    Parameters
+    ----------
+    masks(list)
+        a list of candidate masks, one per box
+
+    tables(IndexTables)
+        the index tables for the board layout
+
+    propagation(str)
+        "sweep" to run full passes of eliminate and only_choice over the board
+        (see reduce_puzzle), or "queue" to only revisit the peers and units
+        touched by each change (see propagate)
+
+    inplace(bool)
+        if True, search on the given masks list instead of copying it for every
+        candidate: each change is recorded on an undo trail and rolled back when
+        a branch fails. This mode always uses queue propagation.
+
+    strategies(Pipeline or list)
+        a strategies.Pipeline, or a list of strategy names, to run whenever
+        propagation stalls (see strategies.py); pass a Pipeline to read its
+        profiling counters afterwards
+
+    trace(Trace)
+        a utils.Trace to record the assignments on the path to the solution in,
+        for replay (see PySudoku.play); nothing is recorded when it is None
+
+    stats(SearchStats)
+        if given, the search adds its node, backtrack and propagation counts to it
+
+    ordering(Ordering or str)
+        an ordering.Ordering, or the name of one in ordering.POLICIES, that
+        chooses the box to branch on and the order its candidates are tried
+        in, and whether the search restarts; None for the default fewest
+        candidates first, in board and digit order
+
+    Returns
+    -------
+    list or False
+        The masks list with every box assigned, or False
+    """
+    if propagation not in ("sweep", "queue"):
+        raise ValueError("Unknown propagation: {!r}".format(propagation))
+    ordering = _ordering(ordering)
+    context = _Search(tables, _pipeline(strategies, tables), trace, SearchStats() if stats is None else stats,
+                      ordering)
+    if ordering is not None and ordering.restarts:
+        return context.restarts(masks, propagation, inplace)
+    return context.run(masks, propagation, inplace)
+
+
+def iter_solutions(grid, tables, strategies=None, stats=None):
+    """Lazily enumerate the solutions of a grid string
+
+    The search propagates in place with an undo trail (see search), and
+    resumes from the last branch point for the next solution, so taking the
+    first n solutions only explores the part of the tree that holds them.
+
+    Parameters
+    ----------
+    grid(string)
+        a string representing a sudoku grid ('.' for empty boxes)
+
+    tables(IndexTables)
+        the index tables for the board layout
+
+    strategies, stats
+        see search
+
+    Yields
+    ------
+    dict
+        The dictionary representation of each solved grid
+    """
+    for masks in solutions(tables.grid2masks(grid), tables, strategies, stats):
+        yield tables.masks2values(masks)
+
+
+def solutions(masks, tables, strategies=None, stats=None, propagated=False):
+    """Lazily enumerate the solutions of a board given as candidate masks
+
+    Like iter_solutions, but starts from any masks list (e.g. a board that has
+    already been propagated) and yields each solution as a new masks list.
+    The given list is used as the search state and is modified. Pass
+    propagated=True when the masks are already propagated (e.g. kept up to
+    date with propagate) to skip propagating the givens again.
+    """
+    context = _Search(tables, _pipeline(strategies, tables), None, SearchStats() if stats is None else stats)
+    if not propagated and not context.start(masks):
+        return
+    for solved in context.inplace(masks, []):
+        yield solved[:]
+
+
+def count_solutions(grid, tables, limit=2, strategies=None, stats=None):
+    """Count the solutions of a grid string, stopping once `limit` are found
+
+    With the default limit of 2 this is a uniqueness check: 0 means the
+    puzzle has no solution, 1 that it is unique, and 2 that it has several.
+    Pass limit=None to count every solution.
+    """
+    return sum(1 for _ in islice(iter_solutions(grid, tables, strategies, stats), limit))
+
+
+def split(masks, tables, depth, strategies=None):
+    """Expand the top `depth` levels of the search tree
+
+    Every candidate of the branching box is tried at each level and
+    propagated as in search; the branches that hit a contradiction are
+    dropped. The subtrees below the returned boards partition the rest of the
+    search, so they can be searched independently (see parallel.py).
+
+    Returns
+    -------
+    list
+        The masks lists of the boards at the frontier, in search order; a
+        board that was solved above the frontier is returned as is
+    """
+    context = _Search(tables, _pipeline(strategies, tables), None, SearchStats())
+    if not context.start(masks):
+        return []
+    frontier = [masks]
+    for _ in range(depth):
+        expanded = []
+        for board in frontier:
+            box = context.choose(board)
+            if box is None:
+                expanded.append(board)
+                continue
+            for bit in context._branches(board, box):
+                attempt = board[:]
+                attempt[box] = bit
+                if propagate(attempt, tables, [box], tables.box_units[box]) and context.settle(attempt):
+                    expanded.append(attempt)
+        frontier = expanded
+    return frontier
+
+
+def _pipeline(strategies, tables):
+    """Return a strategies.Pipeline for a Pipeline or a list of names, adding
+    the strategies the board needs (see IndexTables.strategies)
+    """
+    if tables.strategies:
+        if strategies is None:
+            strategies = list(tables.strategies)
+        elif not hasattr(strategies, "apply"):
+            strategies = list(tables.strategies) + [name for name in strategies if name not in tables.strategies]
+        elif any(name not in [s.name for s in strategies.strategies] for name in tables.strategies):
+            raise ValueError("The board needs the strategies {}".format(tables.strategies))
+    if strategies is None or hasattr(strategies, "apply"):
+        return strategies
+    from strategies import Pipeline
+    return Pipeline(strategies)
+
+
+def _ordering(ordering):
+    """Return an ordering.Ordering for an Ordering, a policy name or None """
+    if ordering is None or hasattr(ordering, "choose"):
+        return ordering
+    from ordering import policy
+    return policy(ordering)
+
+
+def solve(grid, tables, propagation="sweep", inplace=False, strategies=None, trace=None, stats=None,
+          ordering=None):
+    """Solve a grid string with the bitmask engine (see search for the options)
+
+    Returns
+    -------
+    dict or False
+        The dictionary representation of the final sudoku grid or False if no solution exists.
+    """
+    masks = search(tables.grid2masks(grid), tables, propagation, inplace, strategies, trace, stats, ordering)
+    if masks is False:
+        return False
+    return tables.masks2values(masks)
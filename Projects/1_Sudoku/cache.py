@@ -0,0 +1,213 @@
+"""Symmetry-canonicalized solution cache for 9x9 diagonal Sudoku grids
+
+Many puzzles are transformations of each other. Relabeling the digits, and
+any of the 48 row and column shuffles below that map both diagonals onto
+diagonals, turn a diagonal Sudoku into another valid one. The rows and
+columns are shuffled by the same permutation π (one of 24), and the columns
+may also be reversed (which swaps the two diagonals). π keeps every band
+together and commutes with reversing the lines, i ↦ 8 - i. A transpose
+doubles the count to 96 symmetries.
+
+canonicalize() maps a grid string to the smallest of its transformed forms,
+with the digits of each form relabeled in order of first appearance, so all
+isomorphic puzzles share one canonical form. A SolutionCache keys solutions
+on that form in an in-memory LRU, optionally backed by a sqlite3 database so
+that the entries survive restarts, and maps a cached solution back onto
+the grid it was asked for. solution.solve(grid, cache=...) checks the cache
+before searching.
+
+    with SolutionCache("solutions.db") as cache:
+        values = solution.solve(grid, engine="bitmask", cache=cache)
+"""
+import sqlite3
+
+from collections import OrderedDict
+from itertools import permutations, product
+
+
+ORDER = 3
+DIGITS = '123456789'
+
+
+def _line_permutations(order):
+    """Return every permutation of the lines of a board that keeps the bands
+    together and commutes with reversing the line order
+    """
+    size = order * order
+    result = []
+    for bands in permutations(range(order)):
+        if any(bands[order - 1 - b] != order - 1 - bands[b] for b in range(order)):
+            continue
+        for inner in product(permutations(range(order)), repeat=order):
+            pi = [bands[b] * order + inner[b][j] for b in range(order) for j in range(order)]
+            if all(pi[size - 1 - i] == size - 1 - pi[i] for i in range(size)):
+                result.append(pi)
+    return result
+
+
+def _symmetries(order):
+    """Return the diagonal-preserving symmetries of the board as tuples of
+    source indices: symmetry s moves box s[k] of a grid to box k
+    """
+    size = order * order
+    result = set()
+    for pi in _line_permutations(order):
+        for cols in (pi, [size - 1 - p for p in pi]):
+            result.add(tuple(pi[r] * size + cols[c] for r in range(size) for c in range(size)))
+            result.add(tuple(cols[c] * size + pi[r] for r in range(size) for c in range(size)))
+    return sorted(result)
+
+
+SYMMETRIES = _symmetries(ORDER)
+
+
+def canonicalize(grid):
+    """Return the canonical form of a grid string and the transform that produced it
+
+    Parameters
+    ----------
+    grid(string)
+        an 81-character grid string ('.' for empty boxes)
+
+    Returns
+    -------
+    tuple
+        (canonical, transform): the canonical grid string, and the
+        (symmetry, relabel) pair that maps the grid onto it, for restore()
+    """
+    best = None
+    for symmetry in SYMMETRIES:
+        relabel = {}
+        out = []
+        smaller = best is None
+        for k, source in enumerate(symmetry):
+            symbol = grid[source]
+            if symbol != '.':
+                label = relabel.get(symbol)
+                if label is None:
+                    label = relabel[symbol] = DIGITS[len(relabel)]
+                symbol = label
+            if not smaller:
+                if symbol > best[k]:
+                    break
+                smaller = symbol < best[k]
+            out.append(symbol)
+        else:
+            if smaller:
+                best, best_symmetry, best_relabel = out, symmetry, relabel
+    # digits missing from the grid take the remaining labels in order
+    unused = iter(DIGITS[len(best_relabel):])
+    for digit in DIGITS:
+        if digit not in best_relabel:
+            best_relabel[digit] = next(unused)
+    return ''.join(best), (best_symmetry, best_relabel)
+
+
+def apply_transform(grid, transform):
+    """Apply a transform returned by canonicalize to another grid string """
+    symmetry, relabel = transform
+    return ''.join(relabel.get(grid[source], '.') for source in symmetry)
+
+
+def restore(grid, transform):
+    """Undo a transform returned by canonicalize on a grid string """
+    symmetry, relabel = transform
+    inverse = {label: digit for digit, label in relabel.items()}
+    out = ['.'] * len(symmetry)
+    for k, source in enumerate(symmetry):
+        out[source] = inverse.get(grid[k], '.')
+    return ''.join(out)
+
+
+class SolutionCache:
+    """An LRU cache of solutions keyed on canonical grids
+
+    Attributes
+    ----------
+    hits : int
+        number of lookups answered from the cache
+
+    misses : int
+        number of lookups that were not
+
+    Solutions are grid strings; an empty string records a puzzle without a
+    solution. With a path, every entry is also written to a sqlite3
+    database, and lookups that miss the in-memory LRU fall back to it.
+    """
+    def __init__(self, path=None, maxsize=4096):
+        """
+        Parameters
+        ----------
+        path(str)
+            the sqlite3 database file to persist the cache in (in memory only if None)
+
+        maxsize(int)
+            the number of entries kept in memory
+        """
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = self.misses = 0
+        self._last = None
+        self.db = None
+        if path is not None:
+            self.db = sqlite3.connect(path)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("CREATE TABLE IF NOT EXISTS solutions "
+                            "(puzzle TEXT PRIMARY KEY, solution TEXT NOT NULL)")
+            self.db.commit()
+
+    def _canonicalize(self, grid):
+        # a miss is usually followed by put() for the same grid
+        if self._last is None or self._last[0] != grid:
+            self._last = (grid,) + canonicalize(grid)
+        return self._last[1:]
+
+    def get(self, grid):
+        """Look up the solution of a grid string
+
+        Returns
+        -------
+        str or None
+            The solved grid string, an empty string if the puzzle is known
+            to have no solution, or None if the cache does not know it
+        """
+        canonical, transform = self._canonicalize(grid)
+        solved = self.entries.get(canonical)
+        if solved is not None:
+            self.entries.move_to_end(canonical)
+        elif self.db is not None:
+            row = self.db.execute("SELECT solution FROM solutions WHERE puzzle = ?", (canonical,)).fetchone()
+            if row is not None:
+                solved = row[0]
+                self._remember(canonical, solved)
+        if solved is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return restore(solved, transform) if solved else ''
+
+    def put(self, grid, solved):
+        """Store the solution of a grid string ('' or None for no solution) """
+        canonical, transform = self._canonicalize(grid)
+        solved = apply_transform(solved, transform) if solved else ''
+        self._remember(canonical, solved)
+        if self.db is not None:
+            self.db.execute("INSERT OR REPLACE INTO solutions VALUES (?, ?)", (canonical, solved))
+            self.db.commit()
+
+    def _remember(self, canonical, solved):
+        self.entries[canonical] = solved
+        self.entries.move_to_end(canonical)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,123 @@
+"""Exact-cover backend for the Sudoku solver (Knuth's Algorithm X)
+
+A board is an exact cover problem with one column for every box ("the box
+holds a digit") and one column for every (unit, digit) pair ("the unit holds
+the digit"), built from the same unit tables as the other engines, so the
+diagonal units are covered like any other unit. Each row places one digit in
+one box and covers the box column plus one column per unit of the box.
+
+The links are kept as a dict of sets (column -> rows) that is covered and
+uncovered in place while searching, which is the usual Python rendering of
+Dancing Links: removing a column or row and putting it back are O(1) set
+operations, and the search always branches on the column with the fewest rows.
+"""
+from functools import lru_cache
+
+
+class ExactCover:
+    """The exact cover matrix for an IndexTables board layout
+
+    Attributes
+    ----------
+    ndigits : int
+        number of digits; row r places digit r % ndigits in box r // ndigits
+
+    rows : list
+        rows[r] is the tuple of columns covered by row r
+
+    columns : dict
+        a mapping from every column to the set of rows that cover it
+    """
+    def __init__(self, tables):
+        if tables.strategies:
+            raise ValueError("Exact cover cannot express the strategies {} the board needs".format(
+                tables.strategies))
+        self.ndigits = nd = len(tables.digits)
+        nboxes = len(tables.boxes)
+        self.rows = []
+        for i in range(nboxes):
+            for d in range(nd):
+                self.rows.append((i,) + tuple(nboxes + u * nd + d for u in tables.box_units[i]))
+        self.columns = {}
+        for r, cols in enumerate(self.rows):
+            for c in cols:
+                self.columns.setdefault(c, set()).add(r)
+
+
+exact_cover = lru_cache()(ExactCover)
+
+
+def _select(X, Y, r):
+    cols = []
+    for j in Y[r]:
+        for i in X[j]:
+            for k in Y[i]:
+                if k != j:
+                    X[k].discard(i)
+        cols.append(X.pop(j))
+    return cols
+
+
+def _deselect(X, Y, r, cols):
+    for j in reversed(Y[r]):
+        X[j] = cols.pop()
+        for i in X[j]:
+            for k in Y[i]:
+                if k != j:
+                    X[k].add(i)
+
+
+def _search(X, Y, partial):
+    if not X:
+        yield partial
+        return
+    c = min(X, key=lambda c: len(X[c]))
+    for r in list(X[c]):
+        partial.append(r)
+        cols = _select(X, Y, r)
+        yield from _search(X, Y, partial)
+        _deselect(X, Y, r, cols)
+        partial.pop()
+
+
+def iter_solutions(grid, tables):
+    """Enumerate every solution of a grid string
+
+    Parameters
+    ----------
+    grid(string)
+        a string representing a sudoku grid ('.' for empty boxes)
+
+    tables(IndexTables)
+        the index tables for the board layout
+
+    Yields
+    ------
+    dict
+        The dictionary representation of each solved grid
+    """
+    cover = exact_cover(tables)
+    nd, Y = cover.ndigits, cover.rows
+    X = {c: set(rows) for c, rows in cover.columns.items()}
+    partial = []
+    for i, symbol in enumerate(grid):
+        if symbol == '.':
+            continue
+        r = i * nd + tables.digits.index(symbol)
+        if any(c not in X or r not in X[c] for c in Y[r]):
+            return
+        _select(X, Y, r)
+        partial.append(r)
+    for rows in _search(X, Y, partial):
+        yield {tables.boxes[r // nd]: tables.digits[r % nd] for r in sorted(rows)}
+
+
+def solve(grid, tables):
+    """Solve a grid string by exact cover
+
+    Returns
+    -------
+    dict or False
+        The dictionary representation of the final sudoku grid or False if no solution exists.
+    """
+    return next(iter_solutions(grid, tables), False)
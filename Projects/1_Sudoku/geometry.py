@@ -0,0 +1,80 @@
+"""Board geometry for N²×N² Sudoku boards
+
+utils.py and solution.py describe the 9×9 board with box-name strings. A
+Geometry describes a board of any order N (4×4, 9×9, 16×16, 25×25, ...) and
+computes its unit and peer tables directly as box indices, so building the
+tables takes time proportional to the number of unit memberships instead of
+scanning every unit for every box. Geometry objects are IndexTables, so the
+bitmask, dlx and vectorized engines run on any of them.
+"""
+import bitmask
+
+
+ROW_LABELS = 'ABCDEFGHIJKLMNOPQRSTUVWXY'
+DIGITS = '123456789ABCDEFGHIJKLMNOP'
+
+
+class Geometry(bitmask.IndexTables):
+    """Unit and peer tables for a board with N×N squares
+
+    Attributes
+    ----------
+    order : int
+        N, the side length of a square; the board has N² rows and columns
+
+    size : int
+        N², the number of digits, and of boxes in each unit
+
+    diagonal : bool
+        whether the two main diagonals are units
+
+    unitlist : list
+        the units as lists of box names, in the order of `units`: rows,
+        columns, squares, then the diagonals
+
+    Boxes are named by a row letter and a column number (e.g. "A1", "P16"),
+    and the digits of boards larger than 9×9 continue with letters ('A' is 10).
+    """
+    def __init__(self, order=3, diagonal=True):
+        """
+        Parameters
+        ----------
+        order(int)
+            N, between 2 and 5
+
+        diagonal(bool)
+            add the two main diagonals as units (diagonal Sudoku)
+        """
+        if not 2 <= order <= 5:
+            raise ValueError("Board order must be between 2 and 5, got {!r}".format(order))
+        self.order = n = order
+        self.size = size = n * n
+        self.diagonal = diagonal
+        boxes = [r + str(c + 1) for r in ROW_LABELS[:size] for c in range(size)]
+
+        rows = [tuple(r * size + c for c in range(size)) for r in range(size)]
+        cols = [tuple(r * size + c for r in range(size)) for c in range(size)]
+        squares = [tuple((br + r) * size + bc + c for r in range(n) for c in range(n))
+                   for br in range(0, size, n) for bc in range(0, size, n)]
+        units = rows + cols + squares
+        if diagonal:
+            units.append(tuple(i * size + i for i in range(size)))
+            units.append(tuple((size - 1 - i) * size + i for i in range(size)))
+
+        peers = [set() for _ in boxes]
+        for unit in units:
+            for i in unit:
+                peers[i].update(unit)
+        peers = [tuple(sorted(p - {i})) for i, p in enumerate(peers)]
+        self._build(boxes, units, peers, DIGITS[:size])
+        self.unitlist = [[boxes[i] for i in unit] for unit in units]
+
+    def __repr__(self):
+        return "Geometry(order={}, diagonal={})".format(self.order, self.diagonal)
+
+    def __hash__(self):
+        return hash((self.order, self.diagonal))
+
+    def __eq__(self, other):
+        return (isinstance(other, Geometry)
+            and (self.order, self.diagonal) == (other.order, other.diagonal))
@@ -97,6 +97,17 @@ class SudokuSquare:
         self.draw()
 
 
+    def set_number(self, number):
+        """Show `number` in the square (None for an empty square); the caller redraws it """
+        if number != None:
+            self.color = (2, 204, 186)
+            number = str(number)
+        else:
+            self.color = (255, 255, 255)
+            number = ""
+        self.text = self.font.render(number, 1, (255, 255, 255))
+
+
     def change(self, number):
         if number != None:
             number = str(number)
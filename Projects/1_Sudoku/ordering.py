@@ -0,0 +1,121 @@
+"""Variable and value ordering policies for the bitmask search
+
+By default bitmask.search branches on the unsolved box with the fewest
+candidates (ties go to the first box in board order) and tries its
+candidates in digit order. An Ordering replaces either choice:
+
+    variable    "mrv"         fewest candidates, ties in board order
+                "mrv-degree"  fewest candidates, ties to the box with the
+                              most unsolved peers
+                "mrv-random"  fewest candidates, ties broken at random
+    value       "index"       digit order
+                "lcv"         least constraining value first: the digit
+                              that fewest unsolved peers still allow
+                "random"      random order
+
+With restarts, the search gives up once it has tried `node_cap` nodes and
+starts over, with the cap multiplied by `growth` each time, so a randomized
+policy that wandered into a huge failing subtree gets another draw while
+the growing cap keeps the search complete.
+
+POLICIES holds the named policies accepted by search(..., ordering=name).
+"""
+import random
+
+
+class Ordering:
+    """A variable and value ordering policy for bitmask.search
+
+    Attributes
+    ----------
+    name : str
+        the name the policy is reported under (e.g. in benchmark results)
+
+    variable, value : str
+        the variable and value ordering rules (see the module docstring)
+
+    restarts : bool
+        whether the search restarts after `node_cap` nodes
+
+    node_cap : int
+        the number of nodes of the first attempt when restarting
+
+    growth : float
+        the factor the node cap grows by after each restart
+
+    seed : int or None
+        the seed of the random choices; every search starts from this seed
+    """
+    VARIABLES = ("mrv", "mrv-degree", "mrv-random")
+    VALUES = ("index", "lcv", "random")
+
+    def __init__(self, variable="mrv", value="index", restarts=False, node_cap=64, growth=2.0,
+                 seed=None, name=None):
+        if variable not in self.VARIABLES:
+            raise ValueError("Unknown variable ordering: {!r}".format(variable))
+        if value not in self.VALUES:
+            raise ValueError("Unknown value ordering: {!r}".format(value))
+        self.variable = variable
+        self.value = value
+        self.restarts = restarts
+        self.node_cap = node_cap
+        self.growth = growth
+        self.seed = seed
+        self.name = name or "{}/{}{}".format(variable, value, "/restarts" if restarts else "")
+
+    def __repr__(self):
+        return "Ordering({!r})".format(self.name)
+
+    def rng(self):
+        """Return a new random number generator for one search """
+        return random.Random(self.seed)
+
+    def choose(self, masks, tables, rng):
+        """Return the index of the box to branch on, or None if every box is solved """
+        best, ties = None, []
+        for i, m in enumerate(masks):
+            if m & (m - 1):
+                n = bin(m).count('1')
+                if best is None or n < best:
+                    best, ties = n, [i]
+                elif n == best:
+                    ties.append(i)
+        if len(ties) < 2 or self.variable == "mrv":
+            return ties[0] if ties else None
+        if self.variable == "mrv-random":
+            return rng.choice(ties)
+        peers = tables.peers
+        return max(ties, key=lambda i: sum(1 for p in peers[i] if masks[p] & (masks[p] - 1)))
+
+    def values(self, masks, tables, box, rng):
+        """Return the candidate bits of a box in the order they are tried """
+        m = masks[box]
+        bits = []
+        while m:
+            bit = m & -m
+            m ^= bit
+            bits.append(bit)
+        if self.value == "lcv":
+            peers = [masks[p] for p in tables.peers[box] if masks[p] & (masks[p] - 1)]
+            bits.sort(key=lambda bit: sum(1 for pm in peers if pm & bit))
+        elif self.value == "random":
+            rng.shuffle(bits)
+        return bits
+
+
+POLICIES = {
+    "mrv": Ordering(name="mrv"),
+    "mrv-degree": Ordering("mrv-degree", name="mrv-degree"),
+    "lcv": Ordering(value="lcv", name="lcv"),
+    "mrv-degree-lcv": Ordering("mrv-degree", "lcv", name="mrv-degree-lcv"),
+    "restarts": Ordering("mrv-random", "random", restarts=True, seed=0, name="restarts"),
+}
+
+
+def policy(ordering):
+    """Return the Ordering for a policy name, or the Ordering itself """
+    if ordering is None or isinstance(ordering, Ordering):
+        return ordering
+    if ordering not in POLICIES:
+        raise ValueError("Unknown ordering policy: {!r}".format(ordering))
+    return POLICIES[ordering]
@@ -0,0 +1,102 @@
+"""Solve a single hard puzzle with a parallel split search
+
+The top `depth` levels of the search tree are expanded in the calling
+process (see bitmask.split), and the subtrees below the frontier are searched
+by a pool of worker processes, each with the sequential bitmask search. The
+subtrees are handed out one at a time as workers become free, and the pool
+is terminated as soon as one of them returns a solution, which cancels the
+searches still running.
+
+    python parallel.py '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3' \\
+        --depth 3 --workers 8
+"""
+import argparse
+import sys
+
+from multiprocessing import Pool
+from timeit import default_timer as timer
+
+import bitmask
+import solution
+
+
+# the board layout and search options of a worker process, set by _initialize
+_worker = {}
+
+
+def _initialize(tables, options):
+    _worker["tables"] = tables
+    _worker["options"] = options
+
+
+def _search_subtree(masks):
+    return bitmask.search(masks, _worker["tables"], **_worker["options"])
+
+
+def solve_parallel(grid, tables=None, depth=2, workers=None, **options):
+    """Solve a grid string by searching the subtrees of its search tree in parallel
+
+    Parameters
+    ----------
+    grid(string)
+        a string representing a sudoku grid ('.' for empty boxes)
+
+    tables(IndexTables)
+        the board layout; defaults to the 9x9 diagonal board of solution.py
+
+    depth(int)
+        the number of search levels expanded before the subtrees are handed
+        to the workers; every level multiplies the number of subtrees by the
+        branching factor (about 2-3 on 9x9 boards)
+
+    workers(int)
+        number of worker processes (defaults to the number of CPUs); with 1
+        worker the subtrees are searched in the calling process
+
+    options
+        keyword options for the search of each subtree (see bitmask.search),
+        e.g. propagation="queue"; the trace and stats options are not supported
+
+    Returns
+    -------
+    dict or False
+        The dictionary representation of the final sudoku grid or False if no solution exists.
+    """
+    tables = solution.tables if tables is None else tables
+    if "trace" in options or "stats" in options:
+        raise ValueError("The trace and stats options do not apply to a parallel search")
+    frontier = bitmask.split(tables.grid2masks(grid), tables, depth, options.get("strategies"))
+    if workers == 1 or len(frontier) <= 1:
+        for masks in frontier:
+            masks = bitmask.search(masks, tables, **options)
+            if masks:
+                return tables.masks2values(masks)
+        return False
+    with Pool(workers, _initialize, (tables, options)) as pool:
+        # leaving the with block terminates the workers still searching
+        for masks in pool.imap_unordered(_search_subtree, frontier):
+            if masks:
+                return tables.masks2values(masks)
+    return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve one Sudoku puzzle with a parallel split search.")
+    parser.add_argument('grid', help="The puzzle as an 81-character grid string")
+    parser.add_argument('-d', '--depth', type=int, default=2,
+                        help="Number of search levels expanded before the subtrees are split up")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Number of worker processes (default: number of CPUs)")
+    parser.add_argument('-p', '--propagation', choices=['sweep', 'queue'], default='queue',
+                        help="Propagation used by the searches (see bitmask.search)")
+    args = parser.parse_args(argv)
+
+    start = timer()
+    values = solve_parallel(args.grid, depth=args.depth, workers=args.workers, propagation=args.propagation)
+    elapsed = timer() - start
+    print(solution.values2grid(values) if values else "No solution")
+    print("Solved in {:.3f} seconds".format(elapsed), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""Serve Sudoku solves over a local TCP or Unix socket
+
+Clients send one grid string per line and get one line back per grid, in the
+order they were sent:
+
+    <solved grid> <solve ms> <total ms>
+
+where the solved grid is in values2grid format, or '-' if the puzzle has no
+solution. The solve time is spent in the worker, and the total time runs
+from the moment the server read the line to the moment the answer is ready,
+so it includes the wait in the batch and in the pool. A line that is not a
+grid of the 9x9 board is answered with "error <message>", and blank lines
+are skipped.
+
+Starting a Python process per puzzle costs more than the solve itself
+(interpreter startup, and building the unit and peer tables on import), so
+the server keeps one pool of worker processes for its whole life, started
+and warmed up before the first connection is accepted. Requests from every
+connection are gathered into micro-batches: a batch is sent to the pool when
+it holds `batch_size` grids, or `delay` seconds after its first grid arrived,
+whichever comes first. A connection can send many grids without waiting for
+the answers, and stays open for as long as the client keeps it open.
+
+    python server.py --port 8765 --workers 8
+    python server.py --unix /tmp/sudoku.sock
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from timeit import default_timer as timer
+
+import batch
+import solution
+
+
+SYMBOLS = set('.' + solution.cols)
+
+# asyncio.current_task is new in Python 3.7 (and Task.current_task is gone in 3.9)
+_current_task = getattr(asyncio, "current_task", None) or asyncio.Task.current_task
+
+
+def _warm_up():
+    # importing solution in the worker builds the tables once per process
+    return os.getpid()
+
+
+def solve_timed(grids, engine="bitmask", **options):
+    """Solve a batch of grid strings, timing each solve
+
+    Returns
+    -------
+    list
+        (solved grid or None, solve time in milliseconds) for each grid
+    """
+    results = []
+    for grid in grids:
+        start = timer()
+        solved = batch.solve_grid(grid, engine, **options)
+        results.append((solved, (timer() - start) * 1000))
+    return results
+
+
+def check_grid(grid):
+    """Return why a line is not a grid string of the 9x9 board, or None if it is one """
+    if len(grid) != len(solution.boxes):
+        return "expected {} characters, got {}".format(len(solution.boxes), len(grid))
+    if not SYMBOLS.issuperset(grid):
+        return "unexpected characters {}".format(''.join(sorted(set(grid) - SYMBOLS)))
+    return None
+
+
+class SolveServer:
+    """An asyncio server that micro-batches solves into a warm process pool
+
+    Attributes
+    ----------
+    batches : int
+        number of batches sent to the pool so far
+
+    solved : int
+        number of grids answered so far (with or without a solution)
+    """
+    def __init__(self, workers=None, batch_size=64, delay=0.002, engine="bitmask", **options):
+        """
+        Parameters
+        ----------
+        workers(int)
+            number of worker processes (defaults to the number of CPUs)
+
+        batch_size(int)
+            the most grids sent to a worker at a time
+
+        delay(float)
+            the longest time, in seconds, the first grid of a batch waits for
+            more grids to join it
+
+        engine(str), options
+            passed through to solution.solve
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.delay = delay
+        self.solve = partial(solve_timed, engine=engine, **options)
+        self.batches = self.solved = 0
+        self.pool = None
+        self.server = None
+        self.path = None
+        self._queue = None
+        self._batcher = None
+        self._connections = set()
+
+    async def start(self, host="127.0.0.1", port=0, path=None):
+        """Start the workers and listen on a TCP port, or on a Unix socket if a path is given
+
+        Returns
+        -------
+        asyncio.Server
+            the listening server (e.g. for server.sockets[0].getsockname())
+        """
+        loop = asyncio.get_event_loop()
+        self.pool = ProcessPoolExecutor(self.workers)
+        await asyncio.gather(*(loop.run_in_executor(self.pool, _warm_up) for _ in range(self.workers)))
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.ensure_future(self._batch())
+        if path is not None:
+            self.server = await asyncio.start_unix_server(self._handle, path)
+            self.path = path
+        else:
+            self.server = await asyncio.start_server(self._handle, host, port)
+        return self.server
+
+    async def close(self):
+        """Stop listening, drop the open connections and shut the workers down """
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.path is not None and os.path.exists(self.path):
+            os.unlink(self.path)
+        for connection in self._connections:
+            connection.cancel()
+        await asyncio.gather(*self._connections)
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def submit(self, grid):
+        """Queue a grid string for the next batch
+
+        Returns
+        -------
+        asyncio.Future
+            resolves to (solved grid or None, solve time in milliseconds)
+        """
+        future = asyncio.get_event_loop().create_future()
+        self._queue.put_nowait((grid, future))
+        return future
+
+    async def _batch(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            pending = [await self._queue.get()]
+            deadline = loop.time() + self.delay
+            while len(pending) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            self.batches += 1
+            done = loop.run_in_executor(self.pool, self.solve, [grid for grid, _ in pending])
+            done.add_done_callback(partial(self._resolve, [future for _, future in pending]))
+
+    def _resolve(self, futures, done):
+        error = done.exception()
+        results = None if error else done.result()
+        for k, future in enumerate(futures):
+            if future.done():
+                continue
+            if error:
+                future.set_exception(error)
+            else:
+                future.set_result(results[k])
+
+    async def _answer(self, grid, received):
+        problem = check_grid(grid)
+        if problem:
+            return "error " + problem
+        try:
+            solved, solve_ms = await self.submit(grid)
+        except Exception as error:
+            return "error {}".format(error)
+        self.solved += 1
+        return "{} {:.3f} {:.3f}".format(solved or '-', solve_ms, (timer() - received) * 1000)
+
+    async def _handle(self, reader, writer):
+        # the answers are written in request order while later lines are read
+        answers = asyncio.Queue()
+
+        async def write():
+            while True:
+                answer = await answers.get()
+                if answer is None:
+                    break
+                writer.write((await answer + '\n').encode())
+                await writer.drain()
+
+        writing = asyncio.ensure_future(write())
+        self._connections.add(_current_task())
+        try:
+            async for line in reader:
+                grid = line.decode(errors="replace").strip()
+                if grid:
+                    answers.put_nowait(asyncio.ensure_future(self._answer(grid, timer())))
+            answers.put_nowait(None)
+            await writing
+        except (ConnectionError, asyncio.CancelledError):
+            # the client went away, or close() is shutting the server down
+            pass
+        finally:
+            self._connections.discard(_current_task())
+            writing.cancel()
+            writer.close()
+
+
+async def serve(host="127.0.0.1", port=8765, path=None, **options):
+    """Run a SolveServer until it is cancelled (see SolveServer for the options) """
+    async with SolveServer(**options) as server:
+        listening = await server.start(host, port, path)
+        where = path or "{}:{}".format(*listening.sockets[0].getsockname()[:2])
+        print("Serving on {} with {} workers".format(where, server.workers), file=sys.stderr)
+        # Server.serve_forever is new in Python 3.7; the server accepts
+        # connections on its own while this coroutine waits to be cancelled
+        while True:
+            await asyncio.sleep(3600)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve Sudoku solves over a local socket: send one " +
+        "81-character grid per line, and read back one '<solved grid> <solve ms> <total ms>' line per grid.")
+    parser.add_argument('--host', default='127.0.0.1', help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument('-p', '--port', type=int, default=8765, help="TCP port to listen on (default: 8765)")
+    parser.add_argument('-u', '--unix', default=None, help="Listen on this Unix socket path instead of TCP")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Number of worker processes (default: number of CPUs)")
+    parser.add_argument('-b', '--batch-size', type=int, default=64,
+                        help="Most grids sent to a worker at a time")
+    parser.add_argument('-d', '--delay', type=float, default=2.0,
+                        help="Milliseconds a batch waits for more grids after its first one")
+    parser.add_argument('-e', '--engine', choices=['bitmask', 'strings', 'dlx'], default='bitmask',
+                        help="Solver engine to use")
+    args = parser.parse_args(argv)
+
+    loop = asyncio.get_event_loop()
+    serving = asyncio.ensure_future(serve(args.host, args.port, args.unix, workers=args.workers,
+                                          batch_size=args.batch_size, delay=args.delay / 1000,
+                                          engine=args.engine))
+    try:
+        loop.run_until_complete(serving)
+    except KeyboardInterrupt:
+        # let serve() close the server and shut the workers down
+        serving.cancel()
+        try:
+            loop.run_until_complete(serving)
+        except asyncio.CancelledError:
+            pass
+    finally:
+        loop.close()
+
+
+if __name__ == "__main__":
+    main()
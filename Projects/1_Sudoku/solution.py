@@ -1,5 +1,10 @@
 
+from collections import defaultdict
+from itertools import islice
+
 from utils import *
+import bitmask
+import dlx
 
 def diagonal(x,y):
     diag_units = []
@@ -28,6 +33,9 @@ unitlist = row_units + column_units + square_units + diagonal_units
 units = extract_units(unitlist, boxes)
 peers = extract_peers(units, boxes)
 
+# Integer versions of the tables above, used by the bitmask and dlx engines
+tables = bitmask.IndexTables(boxes, unitlist, peers)
+
 
 
 def naked_twins(values):
@@ -67,57 +75,24 @@ def naked_twins(values):
     Pseudocode for this algorithm on github:
     https://github.com/udacity/artificial-intelligence/blob/master/Projects/1_Sudoku/pseudocode.md
     """
-    #print("values")
-    #display(values)
-
-    possible_twins = [box for box in values.keys() if len(values[box]) == 2]
-    twin_matches = [[box1,box2] for box1 in possible_twins for box2 in peers[box1] \
-    if set(values[box1]) == set(values[box2])]
-    
-    #print("twin matches", twin_matches)
-    peersList = []
-    for i in range(len(twin_matches)):
-        box1 = twin_matches[i][0]
-        box2 = twin_matches[i][1]
-        # Find the same values of the peers between the twins
-        peers1 = set(peers[box1])
-        peers2 = set(peers[box2])
-        peers_int = peers1 & peers2
-        # print("peers_int")
-        # print(peers_int)
-        peersList.append(peers_int)
-        # print("peersList")
-        # print(peersList)
-        # Remove twin from the peers
-        # I think I'm removing too much from the board. Remember to exclude the boxes that the twins exist in
-        for individualPeerSets in peersList:
-            # print("individualPeerInts\r")
-            # print(individualPeerInts)
-            for peer_val in individualPeerSets:
-                print("peer_val")
-                print(peer_val)
-                if len(values[peer_val]) > 2:
-                    for rm_val in values[box1]:
-                        values = assign_value(values, peer_val, values[peer_val].replace(rm_val, ''))
-
-    # OLD WORKING CODE EXCEPT PARTIALLY FAILING
-    # for i in range(len(twin_matches)):
-    #     box1 = twin_matches[i][0]
-    #     box2 = twin_matches[i][1]
-    #     # Find the same values of the peers between the twins
-    #     peers1 = set(peers[box1])
-    #     peers2 = set(peers[box2])
-    #     peers_int = peers1 & peers2
-    #     # Remove twin from the peers
-    #     for peer_val in peers_int:
-    #         if len(values[peer_val])>2:
-    #             for rm_val in values[box1]:
-    #                 values = assign_value(values, peer_val, values[peer_val].replace(rm_val,''))
-    #print("post naked twin removal")
-    #display(values)
-    print("values\r")
-    print(display(values))
-    return values    
+    # group the two-candidate boxes of every unit by their candidates; any
+    # group of exactly two boxes is a pair of naked twins. All twins are found
+    # on the original input before any digits are eliminated.
+    twins = []
+    for unit in unitlist:
+        groups = defaultdict(list)
+        for box in unit:
+            if len(values[box]) == 2:
+                groups[''.join(sorted(values[box]))].append(box)
+        twins.extend((unit, digits, boxes) for digits, boxes in groups.items() if len(boxes) == 2)
+
+    for unit, digits, twin_boxes in twins:
+        for box in unit:
+            if box not in twin_boxes and len(values[box]) > 1:
+                for digit in digits:
+                    values = assign_value(values, box, values[box].replace(digit, ''))
+    return values
+
 
 def eliminate(values):
     """Apply the eliminate strategy to a Sudoku puzzle
@@ -236,7 +211,7 @@ def search(values):
             return attempt
 
 
-def solve(grid):
+def solve(grid, engine="strings", geometry=None, cache=None, **options):
     """Find the solution to a Sudoku puzzle using search and constraint propagation
 
     Parameters
@@ -246,26 +221,112 @@ def solve(grid):
         
         Ex. '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
 
+    engine(string)
+        "strings" to search over candidate strings, "bitmask" to search over
+        integer candidate masks (see bitmask.py), or "dlx" to solve the puzzle
+        as an exact cover problem (see dlx.py)
+
+    geometry(Geometry)
+        the board layout for grids other than the 9x9 diagonal board, e.g.
+        geometry.Geometry(4) for 16x16 boards; needs the bitmask or dlx engine
+
+    cache(SolutionCache)
+        a cache.SolutionCache to look the puzzle (or any puzzle isomorphic to
+        it) up in before searching, and to store the result in; a cache hit
+        skips the search, so a trace or stats option is left untouched
+
+    options
+        keyword options for the bitmask engine, e.g. propagation="queue"
+        (see bitmask.search)
+
     Returns
     -------
     dict or False
         The dictionary representation of the final sudoku grid or False if no solution exists.
     """
+    if cache is None:
+        return _solve(grid, engine, geometry, options)
+    if geometry is not None:
+        raise ValueError("The solution cache only holds 9x9 diagonal grids")
+    solved = cache.get(grid)
+    if solved is not None:
+        return grid2values(solved) if solved else False
+    values = _solve(grid, engine, geometry, options)
+    cache.put(grid, values2grid(values) if values else None)
+    return values
+
+
+def _solve(grid, engine, geometry, options):
+    board = tables if geometry is None else geometry
+    if engine == "bitmask":
+        return bitmask.solve(grid, board, **options)
+    if engine not in ("strings", "dlx"):
+        raise ValueError("Unknown engine: {!r}".format(engine))
+    if options:
+        raise ValueError("Options {} only apply to the bitmask engine".format(sorted(options)))
+    if engine == "dlx":
+        return dlx.solve(grid, board)
+    if geometry is not None:
+        raise ValueError("The strings engine only solves the 9x9 board")
     values = grid2values(grid)
     values = search(values)
     return values
 
 
+def iter_solutions(grid, engine="bitmask", geometry=None, **options):
+    """Lazily enumerate every solution of a Sudoku puzzle
+
+    Parameters
+    ----------
+    grid(string)
+        a string representing a sudoku grid
+
+    engine(string)
+        "bitmask" or "dlx" (see solve)
+
+    geometry(Geometry), options
+        see solve
+
+    Yields
+    ------
+    dict
+        The dictionary representation of each solved grid
+    """
+    board = tables if geometry is None else geometry
+    if engine == "bitmask":
+        return bitmask.iter_solutions(grid, board, **options)
+    if engine != "dlx":
+        raise ValueError("Solutions can only be enumerated with the bitmask or dlx engine, not {!r}".format(engine))
+    if options:
+        raise ValueError("Options {} only apply to the bitmask engine".format(sorted(options)))
+    return dlx.iter_solutions(grid, board)
+
+
+def count_solutions(grid, limit=2, engine="bitmask", geometry=None, **options):
+    """Count the solutions of a Sudoku puzzle, stopping once `limit` are found
+
+    With the default limit of 2 this checks uniqueness without finishing the
+    search: 0 means no solution, 1 a unique solution, and 2 several. Pass
+    limit=None to count every solution.
+
+    Returns
+    -------
+    int
+        The number of solutions, at most `limit`
+    """
+    return sum(1 for _ in islice(iter_solutions(grid, engine, geometry, **options), limit))
+
+
 if __name__ == "__main__":
     diag_sudoku_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
     # display(grid2values(diag_sudoku_grid))
-    result = solve(diag_sudoku_grid)
+    trace = Trace()
+    result = solve(diag_sudoku_grid, engine="bitmask", trace=trace)
     # display(result)
-    naked_twins(grid2values(diag_sudoku_grid))
 
     try:
         import PySudoku
-        PySudoku.play(grid2values(diag_sudoku_grid), result, history)
+        PySudoku.play(grid2values(diag_sudoku_grid), trace)
 
     except SystemExit:
         pass
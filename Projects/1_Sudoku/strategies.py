@@ -0,0 +1,319 @@
+"""Pluggable elimination strategies for the bitmask engine
+
+Every strategy is a function registered in STRATEGIES under a name. It takes
+a list of candidate masks and the IndexTables for the board, removes the
+candidates that its rule rules out, appends the index of every box it changed
+to `changed`, and returns the number of candidates it removed. A Pipeline runs
+a list of strategies, cheapest first, and keeps per-strategy counters of
+calls, time spent and candidates removed, so the strategies that pay for
+themselves before search takes over can be measured.
+
+    pipeline = Pipeline(["naked_pairs", "hidden_pairs", "pointing"])
+    solution.solve(grid, engine="bitmask", strategies=pipeline)
+    print(pipeline.report())
+"""
+from collections import defaultdict, OrderedDict
+from functools import lru_cache
+from itertools import combinations
+from timeit import default_timer as timer
+
+from bitmask import popcount
+
+
+STRATEGIES = OrderedDict()
+
+
+def register(name):
+    """Decorator that adds a strategy function to STRATEGIES """
+    def decorator(function):
+        STRATEGIES[name] = function
+        return function
+    return decorator
+
+
+class Layout:
+    """Per-board tables used by the strategies
+
+    Attributes
+    ----------
+    intersections : list
+        (inter, a_rest, b_rest) tuples of box indices for every ordered pair
+        of units A, B that share two or more boxes: the shared boxes, the rest
+        of A, and the rest of B
+
+    common : dict
+        a mapping from a pair of box indices (i < j) to the units holding both
+    """
+    def __init__(self, tables):
+        units = [set(unit) for unit in tables.units]
+        self.intersections = []
+        for a, b in combinations(range(len(units)), 2):
+            inter = units[a] & units[b]
+            if len(inter) < 2:
+                continue
+            for x, y in ((a, b), (b, a)):
+                self.intersections.append((tuple(sorted(inter)),
+                                           tuple(sorted(units[x] - inter)),
+                                           tuple(sorted(units[y] - inter))))
+        common = defaultdict(list)
+        for u, unit in enumerate(tables.units):
+            for i, j in combinations(sorted(unit), 2):
+                common[(i, j)].append(u)
+        self.common = dict(common)
+
+
+layout = lru_cache()(Layout)
+
+
+def _restrict(masks, i, keep, changed, trail):
+    """Intersect the candidates of box i with `keep`; return the number removed """
+    old = masks[i]
+    new = old & keep
+    if new == old:
+        return 0
+    if trail is not None:
+        trail.append((i, old))
+    masks[i] = new
+    changed.append(i)
+    return popcount(old) - popcount(new)
+
+
+@register("naked_pairs")
+def naked_pairs(masks, tables, changed, trail=None):
+    """Two boxes of a unit with the same two candidates hold those two digits,
+    so the digits are removed from the rest of the unit. Twins are found by
+    grouping the two-candidate boxes of each unit by their mask.
+    """
+    removed = 0
+    for unit in tables.units:
+        groups = defaultdict(list)
+        for i in unit:
+            m = masks[i]
+            if popcount(m) == 2:
+                groups[m].append(i)
+        for m, boxes in groups.items():
+            if len(boxes) == 2:
+                for i in unit:
+                    if i not in boxes and masks[i] & m:
+                        removed += _restrict(masks, i, ~m, changed, trail)
+    return removed
+
+
+@register("hidden_pairs")
+def hidden_pairs(masks, tables, changed, trail=None):
+    """Two digits that fit in the same two boxes of a unit and nowhere else in
+    it fill those boxes, so every other candidate is removed from the boxes.
+    Pairs are found by grouping the digits of each unit by where they fit.
+    """
+    removed = 0
+    nd = len(tables.digits)
+    for unit in tables.units:
+        groups = defaultdict(list)
+        for k in range(nd):
+            bit = 1 << k
+            places = tuple(i for i in unit if masks[i] & bit)
+            if len(places) == 2:
+                groups[places].append(bit)
+        for places, bits in groups.items():
+            if len(bits) == 2:
+                keep = bits[0] | bits[1]
+                for i in places:
+                    removed += _restrict(masks, i, keep, changed, trail)
+    return removed
+
+
+@register("pointing")
+def pointing(masks, tables, changed, trail=None):
+    """Pointing pairs and triples (and box/line reduction): digits of a unit
+    A that only fit where A overlaps another unit B must go in the overlap, so
+    they are removed from the rest of B.
+    """
+    removed = 0
+    for inter, a_rest, b_rest in layout(tables).intersections:
+        inside = outside = 0
+        for i in inter:
+            inside |= masks[i]
+        for i in a_rest:
+            outside |= masks[i]
+        locked = inside & ~outside
+        if locked:
+            for i in b_rest:
+                if masks[i] & locked:
+                    removed += _restrict(masks, i, ~locked, changed, trail)
+    return removed
+
+
+@register("naked_triples")
+def naked_triples(masks, tables, changed, trail=None):
+    """Three boxes of a unit whose candidates together are three digits hold
+    those digits, so the digits are removed from the rest of the unit.
+    """
+    removed = 0
+    for unit in tables.units:
+        cells = [i for i in unit if 2 <= popcount(masks[i]) <= 3]
+        for boxes in combinations(cells, 3):
+            m = masks[boxes[0]] | masks[boxes[1]] | masks[boxes[2]]
+            if popcount(m) == 3:
+                for i in unit:
+                    if i not in boxes and masks[i] & m:
+                        removed += _restrict(masks, i, ~m, changed, trail)
+    return removed
+
+
+@register("hidden_triples")
+def hidden_triples(masks, tables, changed, trail=None):
+    """Three digits that only fit in the same three boxes of a unit fill those
+    boxes, so every other candidate is removed from the boxes.
+    """
+    removed = 0
+    nd = len(tables.digits)
+    for unit in tables.units:
+        digits = []
+        for k in range(nd):
+            bit = 1 << k
+            places = frozenset(i for i in unit if masks[i] & bit)
+            if 2 <= len(places) <= 3:
+                digits.append((bit, places))
+        for (b1, p1), (b2, p2), (b3, p3) in combinations(digits, 3):
+            places = p1 | p2 | p3
+            if len(places) == 3:
+                for i in places:
+                    removed += _restrict(masks, i, b1 | b2 | b3, changed, trail)
+    return removed
+
+
+@register("x_wing")
+def x_wing(masks, tables, changed, trail=None):
+    """X-Wing: when a digit fits in exactly two boxes in each of two units, and
+    the boxes pair up across two other units (e.g. two rows whose candidates
+    line up in the same two columns), the digit must take one box of each
+    pair, so it is removed from the rest of the two covering units.
+    """
+    removed = 0
+    common = layout(tables).common
+    nd = len(tables.digits)
+    for k in range(nd):
+        bit = 1 << k
+        lines = []
+        for unit in tables.units:
+            places = [i for i in unit if masks[i] & bit]
+            if len(places) == 2:
+                lines.append(places)
+        for (a1, a2), (b1, b2) in combinations(lines, 2):
+            corners = {a1, a2, b1, b2}
+            if len(corners) < 4:
+                continue
+            for (x1, y1), (x2, y2) in (((a1, b1), (a2, b2)), ((a1, b2), (a2, b1))):
+                for c1 in common.get((min(x1, y1), max(x1, y1)), ()):
+                    for c2 in common.get((min(x2, y2), max(x2, y2)), ()):
+                        if c1 == c2:
+                            continue
+                        for i in tables.units[c1] + tables.units[c2]:
+                            if i not in corners and masks[i] & bit:
+                                removed += _restrict(masks, i, ~bit, changed, trail)
+    return removed
+
+
+@register("cages")
+def cages(masks, tables, changed, trail=None):
+    """Killer cages: the digits of a cage are one of the combinations of
+    distinct digits that make its sum (see variants.Killer). A combination
+    stays possible while it holds the digits already placed in the cage and
+    every box of the cage can take one of its digits, and each box keeps only
+    the digits of the possible combinations. Boards without cages are left
+    alone.
+    """
+    removed = 0
+    for boxes, total, combinations in getattr(tables, "cages", ()):
+        placed = union = 0
+        for i in boxes:
+            m = masks[i]
+            union |= m
+            if m & (m - 1) == 0:
+                placed |= m
+        keep = 0
+        for combination in combinations:
+            if (combination & placed == placed and combination & union == combination
+                    and all(masks[i] & combination for i in boxes)):
+                keep |= combination
+        for i in boxes:
+            if masks[i] & ~keep:
+                removed += _restrict(masks, i, keep, changed, trail)
+    return removed
+
+
+class Strategy:
+    """A registered strategy function with profiling counters
+
+    Attributes
+    ----------
+    calls : int
+        number of times the strategy ran
+
+    seconds : float
+        total time spent in the strategy
+
+    eliminated : int
+        total number of candidates the strategy removed
+    """
+    def __init__(self, name):
+        self.name = name
+        self.function = STRATEGIES[name]
+        self.calls = 0
+        self.seconds = 0.0
+        self.eliminated = 0
+
+    def __call__(self, masks, tables, changed, trail=None):
+        start = timer()
+        removed = self.function(masks, tables, changed, trail)
+        self.seconds += timer() - start
+        self.calls += 1
+        self.eliminated += removed
+        return removed
+
+
+class Pipeline:
+    """An ordered list of strategies run between propagation rounds """
+    def __init__(self, names=None):
+        """
+        Parameters
+        ----------
+        names(iterable)
+            the names of the strategies to run, cheapest first (defaults to
+            every registered strategy in registration order)
+        """
+        if names is None:
+            names = list(STRATEGIES)
+        unknown = [name for name in names if name not in STRATEGIES]
+        if unknown:
+            raise ValueError("Unknown strategies: {}".format(unknown))
+        self.strategies = [Strategy(name) for name in names]
+
+    def apply(self, masks, tables, trail=None):
+        """Run the strategies in order until one of them removes candidates
+
+        Returns
+        -------
+        list or False
+            The indices of the boxes that changed (empty if no strategy made
+            progress), or False if a box ran out of candidates
+        """
+        for strategy in self.strategies:
+            changed = []
+            if strategy(masks, tables, changed, trail):
+                if any(masks[i] == 0 for i in changed):
+                    return False
+                return changed
+        return []
+
+    def stats(self):
+        """Return the counters of every strategy as a dict keyed by name """
+        return OrderedDict((s.name, {"calls": s.calls, "seconds": s.seconds, "eliminated": s.eliminated})
+                           for s in self.strategies)
+
+    def report(self):
+        """Format the strategy counters as a table """
+        lines = ["{:<16}{:>10}{:>12}{:>12}".format("strategy", "calls", "seconds", "eliminated")]
+        for s in self.strategies:
+            lines.append("{:<16}{:>10d}{:>12.4f}{:>12d}".format(s.name, s.calls, s.seconds, s.eliminated))
+        return "\n".join(lines)
@@ -0,0 +1,42 @@
+import unittest
+
+import batch
+import solution
+from utils import values2grid
+
+try:
+    import vectorized
+except ImportError:
+    vectorized = None
+
+
+class TestSolveMany(unittest.TestCase):
+    diagonal_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+    def setUp(self):
+        solved = values2grid(solution.solve(self.diagonal_grid))
+        self.grids = [self.diagonal_grid, '22' + '.' * 79, solved[:40] + '.' * 41]
+        self.expected = [solved, None, solved]
+
+    def test_single_worker(self):
+        self.assertEqual(list(batch.solve_many(self.grids, workers=1)), self.expected)
+
+    def test_worker_pool_keeps_input_order(self):
+        results = batch.solve_many(iter(self.grids * 4), workers=2, chunksize=1)
+        self.assertEqual(list(results), self.expected * 4)
+
+    @unittest.skipIf(vectorized is None, "numpy is not installed")
+    def test_vectorized_chunks_match_bitmask(self):
+        grids = self.grids * 3
+        expected = list(batch.solve_many(grids, workers=1))
+        for workers in (1, 2):
+            results = batch.solve_many(iter(grids), workers=workers, chunksize=2, engine="vectorized")
+            self.assertEqual(list(results), expected)
+
+    def test_read_grids(self):
+        lines = ['# header\n', '\n', self.diagonal_grid + '\n']
+        self.assertEqual(list(batch.read_grids(lines)), [self.diagonal_grid])
+
+
+if __name__ == '__main__':
+    unittest.main()
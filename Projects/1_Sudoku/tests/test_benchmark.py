@@ -0,0 +1,44 @@
+import copy
+import unittest
+
+import benchmark
+
+
+class TestBenchmark(unittest.TestCase):
+
+    def test_corpora(self):
+        for name in benchmark.CORPORA:
+            grids = benchmark.load_corpus(name)
+            self.assertTrue(grids)
+            self.assertTrue(all(len(grid) == 81 for grid in grids))
+
+    def test_percentile(self):
+        values = [1.0, 2.0, 3.0, 4.0, 5.0]
+        self.assertEqual(benchmark.percentile(values, 50), 3.0)
+        self.assertEqual(benchmark.percentile(values, 100), 5.0)
+        self.assertAlmostEqual(benchmark.percentile(values, 90), 4.6)
+
+    def test_run_mode(self):
+        grids = benchmark.load_corpus('hard')[:2]
+        summary = benchmark.run_mode(grids, "bitmask-queue")
+        self.assertEqual((summary["puzzles"], summary["solved"]), (2, 2))
+        self.assertGreater(summary["nodes"], 0)
+        self.assertGreater(summary["peak_memory_kib"], 0)
+        self.assertIsNone(benchmark.run_mode(grids, "dlx")["nodes"])
+
+    def test_compare(self):
+        results = {"modes": {"bitmask-queue": {"hard": benchmark.run_mode(
+            benchmark.load_corpus('hard')[:2], "bitmask-queue")}}}
+        self.assertEqual(benchmark.compare(results, results), [])
+        slower = copy.deepcopy(results)
+        summary = slower["modes"]["bitmask-queue"]["hard"]
+        summary["time_ms"]["p90"] = 2 * summary["time_ms"]["p90"] + benchmark.TIME_FLOOR_MS
+        summary["nodes"] += 1
+        summary["solved"] -= 1
+        regressions = benchmark.compare(slower, results, tolerance=0.25)
+        self.assertEqual(len(regressions), 2)
+        self.assertEqual(len(benchmark.compare(slower, results, tolerance=0)), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import unittest
+
+import bitmask
+import geometry
+import solution
+from utils import Trace, assign_value, grid2values
+
+
+class TestBitmaskEngine(unittest.TestCase):
+    diagonal_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+    def test_tables(self):
+        tables = solution.tables
+        self.assertEqual(len(tables.units), 29)
+        self.assertEqual(len(tables.box_units[tables.index['A1']]), 4)
+        self.assertEqual(len(tables.box_units[tables.index['A2']]), 3)
+        for box in solution.boxes:
+            peers = {tables.boxes[i] for i in tables.peers[tables.index[box]]}
+            self.assertEqual(peers, set(solution.peers[box]))
+
+    def test_roundtrip(self):
+        values = grid2values(self.diagonal_grid)
+        masks = solution.tables.values2masks(values)
+        self.assertEqual(masks, solution.tables.grid2masks(self.diagonal_grid))
+        self.assertEqual(solution.tables.masks2values(masks), values)
+
+    def test_solve_matches_strings(self):
+        self.assertEqual(solution.solve(self.diagonal_grid, engine="bitmask"),
+                         solution.solve(self.diagonal_grid))
+
+    def test_queue_propagation_matches_sweep(self):
+        self.assertEqual(solution.solve(self.diagonal_grid, engine="bitmask", propagation="queue"),
+                         solution.solve(self.diagonal_grid))
+
+    def test_inplace_search_matches_sweep(self):
+        self.assertEqual(solution.solve(self.diagonal_grid, engine="bitmask", inplace=True),
+                         solution.solve(self.diagonal_grid))
+
+    def test_undo_restores_masks(self):
+        tables = solution.tables
+        masks = tables.grid2masks(self.diagonal_grid)
+        before, trail = masks[:], []
+        masks[1] = 1
+        trail.append((1, before[1]))
+        bitmask.propagate(masks, tables, [1], tables.box_units[1], trail)
+        self.assertNotEqual(masks, before)
+        bitmask.undo(masks, trail, 0)
+        self.assertEqual(masks, before)
+        self.assertEqual(trail, [])
+
+    def test_propagate_reports_contradiction(self):
+        tables = solution.tables
+        masks = tables.grid2masks('1' + '.' * 80)
+        masks[tables.index['A2']] = masks[tables.index['A1']]
+        self.assertFalse(bitmask.propagate(masks, tables, [0], range(len(tables.units))))
+
+    def test_contradiction(self):
+        self.assertFalse(solution.solve('22' + '.' * 79, engine="bitmask"))
+        self.assertFalse(solution.solve('22' + '.' * 79, engine="bitmask", propagation="queue"))
+        self.assertFalse(solution.solve('22' + '.' * 79, engine="bitmask", inplace=True))
+
+    def test_trace_replays_the_solution(self):
+        for kwargs in ({}, {"propagation": "queue"}, {"inplace": True}):
+            trace = Trace()
+            result = solution.solve(self.diagonal_grid, engine="bitmask", trace=trace, **kwargs)
+            values = grid2values(self.diagonal_grid)
+            for box, value in trace:
+                values[box] = value
+            self.assertEqual(values, result)
+            self.assertEqual(len(trace), self.diagonal_grid.count('.'))
+
+    def test_trace_rewind(self):
+        trace = Trace()
+        values = grid2values(self.diagonal_grid)
+        assign_value(values, 'A2', '6', trace)
+        mark = trace.mark()
+        assign_value(values, 'A3', '7', trace)
+        assign_value(values, 'A4', '89', trace)
+        self.assertEqual(list(trace), [('A2', '6'), ('A3', '7')])
+        trace.rewind(mark)
+        self.assertEqual(list(trace), [('A2', '6')])
+
+    def test_search_stats(self):
+        grid = '..6......4.....79.....1..6.3.4......9......52.2........4...9......4....17....5.2.'
+        for kwargs in ({}, {"propagation": "queue"}, {"inplace": True}):
+            stats = bitmask.SearchStats()
+            self.assertTrue(bitmask.solve(grid, solution.tables, stats=stats, **kwargs))
+            self.assertGreater(stats.nodes, 0)
+            self.assertLess(stats.backtracks, stats.nodes)
+            self.assertGreaterEqual(stats.propagations, stats.nodes)
+        # propagations counts rounds, not calls: this grid takes several to solve
+        stats = bitmask.SearchStats()
+        masks = solution.tables.grid2masks(self.diagonal_grid)
+        self.assertTrue(bitmask.reduce_puzzle(masks, solution.tables, stats=stats))
+        self.assertGreater(stats.propagations, 1)
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            solution.solve(self.diagonal_grid, engine="abacus")
+
+
+class TestSolutionCounting(unittest.TestCase):
+    diagonal_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+    def test_unique(self):
+        self.assertEqual(solution.count_solutions(self.diagonal_grid), 1)
+        expected = solution.solve(self.diagonal_grid)
+        self.assertEqual(list(solution.iter_solutions(self.diagonal_grid)), [expected])
+
+    def test_no_solution(self):
+        self.assertEqual(solution.count_solutions('22' + '.' * 79), 0)
+        self.assertEqual(list(solution.iter_solutions('22' + '.' * 79)), [])
+
+    def test_solutions_from_propagated_masks(self):
+        tables = solution.tables
+        masks = tables.grid2masks(self.diagonal_grid)
+        solved = [i for i, m in enumerate(masks) if m & (m - 1) == 0]
+        bitmask.propagate(masks, tables, solved, range(len(tables.units)))
+        found = [tables.masks2values(m) for m in bitmask.solutions(masks, tables, propagated=True)]
+        self.assertEqual(found, [solution.solve(self.diagonal_grid)])
+
+    def test_limit_stops_early(self):
+        stats = bitmask.SearchStats()
+        self.assertEqual(solution.count_solutions('.' * 81, limit=5, stats=stats), 5)
+        self.assertLess(stats.nodes, 100)
+        self.assertEqual(solution.count_solutions('.' * 81, strategies=["naked_pairs"]), 2)
+
+    def test_matches_dlx(self):
+        solved = solution.values2grid(solution.solve(self.diagonal_grid))
+        cases = [('.' * 16, geometry.Geometry(2)), ('1...' + '.' * 12, geometry.Geometry(2, diagonal=False)),
+                 (solved[:30] + '.' * 51, None)]
+        for grid, board in cases:
+            expected = list(solution.iter_solutions(grid, engine="dlx", geometry=board))
+            found = list(solution.iter_solutions(grid, geometry=board))
+            key = lambda values: sorted(values.items())
+            self.assertGreater(len(found), 1)
+            self.assertEqual(sorted(found, key=key), sorted(expected, key=key))
+            self.assertEqual(solution.count_solutions(grid, limit=None, geometry=board), len(expected))
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            solution.iter_solutions(self.diagonal_grid, engine="strings")
+
+
+if __name__ == '__main__':
+    unittest.main()
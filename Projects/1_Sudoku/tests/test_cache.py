@@ -0,0 +1,86 @@
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import cache
+import solution
+from utils import values2grid
+
+
+def isomorphic(grid, seed):
+    """Return a random symmetric, relabeled copy of a grid """
+    rng = random.Random(seed)
+    labels = list(cache.DIGITS)
+    rng.shuffle(labels)
+    return cache.apply_transform(grid, (rng.choice(cache.SYMMETRIES), dict(zip(cache.DIGITS, labels))))
+
+
+class TestCanonicalize(unittest.TestCase):
+    diagonal_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+    def test_symmetries_keep_diagonal_sudoku_valid(self):
+        self.assertEqual(len(cache.SYMMETRIES), 96)
+        solved = values2grid(solution.solve(self.diagonal_grid))
+        identity = {d: d for d in cache.DIGITS}
+        for symmetry in cache.SYMMETRIES:
+            grid = cache.apply_transform(solved, (symmetry, identity))
+            self.assertEqual(solution.count_solutions(grid, limit=1), 1)
+
+    def test_isomorphic_grids_share_canonical_form(self):
+        canonical, transform = cache.canonicalize(self.diagonal_grid)
+        self.assertEqual(cache.apply_transform(self.diagonal_grid, transform), canonical)
+        self.assertEqual(cache.restore(canonical, transform), self.diagonal_grid)
+        for seed in range(20):
+            self.assertEqual(cache.canonicalize(isomorphic(self.diagonal_grid, seed))[0], canonical)
+
+
+class TestSolutionCache(unittest.TestCase):
+    diagonal_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'solutions.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_hit_on_isomorphic_puzzle(self):
+        solutions = cache.SolutionCache()
+        expected = solution.solve(self.diagonal_grid, engine="bitmask", cache=solutions)
+        self.assertEqual((solutions.hits, solutions.misses), (0, 1))
+        puzzle = isomorphic(self.diagonal_grid, 3)
+        found = solution.solve(puzzle, engine="bitmask", cache=solutions)
+        self.assertEqual((solutions.hits, solutions.misses), (1, 1))
+        self.assertEqual(found, solution.solve(puzzle, engine="bitmask"))
+        self.assertNotEqual(found, expected)
+
+    def test_no_solution_is_cached(self):
+        solutions = cache.SolutionCache()
+        for _ in range(2):
+            self.assertFalse(solution.solve('22' + '.' * 79, engine="bitmask", cache=solutions))
+        self.assertEqual(solutions.hits, 1)
+
+    def test_persistence(self):
+        with cache.SolutionCache(self.path) as solutions:
+            expected = solution.solve(self.diagonal_grid, engine="dlx", cache=solutions)
+        with cache.SolutionCache(self.path) as solutions:
+            self.assertEqual(solution.solve(self.diagonal_grid, engine="dlx", cache=solutions), expected)
+            self.assertEqual(solutions.hits, 1)
+
+    def test_lru_eviction(self):
+        solutions = cache.SolutionCache(maxsize=1)
+        solutions.put(self.diagonal_grid, values2grid(solution.solve(self.diagonal_grid)))
+        solutions.put('22' + '.' * 79, None)
+        self.assertIsNone(solutions.get(self.diagonal_grid))
+        self.assertEqual(solutions.get('22' + '.' * 79), '')
+
+    def test_geometry_is_rejected(self):
+        from geometry import Geometry
+        with self.assertRaises(ValueError):
+            solution.solve('.' * 16, engine="bitmask", geometry=Geometry(2), cache=cache.SolutionCache())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+
+from itertools import islice
+
+import dlx
+import solution
+from utils import values2grid
+
+
+class TestExactCover(unittest.TestCase):
+    diagonal_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+    def assertValidSolution(self, values, grid):
+        for unit in solution.unitlist:
+            self.assertEqual(sorted(values[box] for box in unit), list('123456789'))
+        for symbol, box in zip(grid, solution.boxes):
+            self.assertIn(symbol, '.' + values[box])
+
+    def test_solve_matches_strings(self):
+        self.assertEqual(solution.solve(self.diagonal_grid, engine="dlx"),
+                         solution.solve(self.diagonal_grid))
+
+    def test_unique_puzzle_has_one_solution(self):
+        self.assertEqual(len(list(dlx.iter_solutions(self.diagonal_grid, solution.tables))), 1)
+
+    def test_enumerates_distinct_solutions(self):
+        grid = values2grid(solution.solve(self.diagonal_grid))[:27] + '.' * 54
+        solutions = list(islice(dlx.iter_solutions(grid, solution.tables), 20))
+        self.assertEqual(len({values2grid(s) for s in solutions}), len(solutions))
+        self.assertGreater(len(solutions), 1)
+        for values in solutions:
+            self.assertValidSolution(values, grid)
+
+    def test_conflicting_givens(self):
+        self.assertFalse(solution.solve('22' + '.' * 79, engine="dlx"))
+        self.assertEqual(list(dlx.iter_solutions('22' + '.' * 79, solution.tables)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import random
+import unittest
+
+import generator
+import solution
+from geometry import Geometry
+
+
+class TestGenerator(unittest.TestCase):
+
+    def test_random_solution(self):
+        masks = generator.random_solution(solution.tables, random.Random(1))
+        grid = solution.tables.masks2grid(masks)
+        self.assertNotIn('.', grid)
+        self.assertEqual(solution.count_solutions(grid), 1)
+
+    def test_puzzles_are_unique(self):
+        for puzzle in generator.generate_many(5, seed=1):
+            self.assertEqual(len(puzzle), 81)
+            self.assertEqual(solution.count_solutions(puzzle), 1)
+
+    def test_seed_is_reproducible(self):
+        puzzles = list(generator.generate_many(4, seed=7))
+        self.assertEqual(list(generator.generate_many(4, seed=7)), puzzles)
+        self.assertEqual(list(generator.generate_many(4, seed=7, workers=2, chunksize=1)), puzzles)
+        self.assertNotEqual(list(generator.generate_many(4, seed=8)), puzzles)
+
+    def test_min_clues(self):
+        for puzzle in generator.generate_many(3, min_clues=30, seed=2):
+            self.assertEqual(81 - puzzle.count('.'), 30)
+            self.assertEqual(solution.count_solutions(puzzle), 1)
+
+    def test_minimal(self):
+        puzzle = generator.generate(rng=random.Random(3))
+        for i, symbol in enumerate(puzzle):
+            if symbol != '.':
+                reduced = puzzle[:i] + '.' + puzzle[i + 1:]
+                self.assertEqual(solution.count_solutions(reduced), 2)
+
+    def test_geometry(self):
+        board = Geometry(2)
+        puzzle = generator.generate(board, rng=random.Random(4))
+        self.assertEqual(len(puzzle), 16)
+        self.assertEqual(solution.count_solutions(puzzle, geometry=board), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
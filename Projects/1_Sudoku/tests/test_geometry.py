@@ -0,0 +1,45 @@
+import unittest
+
+import bitmask
+import solution
+from geometry import Geometry
+
+
+class TestGeometry(unittest.TestCase):
+    def test_matches_solution_tables(self):
+        board = Geometry(3, diagonal=True)
+        self.assertEqual(board.boxes, solution.boxes)
+        self.assertEqual(board.unitlist, solution.unitlist)
+        self.assertEqual(board.units, solution.tables.units)
+        self.assertEqual(board.peers, solution.tables.peers)
+
+    def test_table_sizes(self):
+        for order, diagonal, nunits, corner_peers in [(2, False, 12, 7), (2, True, 14, 9),
+                                                      (4, True, 50, 51), (5, False, 75, 64)]:
+            board = Geometry(order, diagonal)
+            self.assertEqual(len(board.boxes), order ** 4)
+            self.assertEqual(len(board.units), nunits)
+            self.assertEqual(len(board.peers[0]), corner_peers)
+            self.assertTrue(all(len(unit) == order ** 2 for unit in board.units))
+
+    def test_invalid_order(self):
+        with self.assertRaises(ValueError):
+            Geometry(6)
+
+    def test_solve_16x16(self):
+        board = Geometry(4)
+        full = board.masks2grid(bitmask.search(board.grid2masks('.' * 256), board, "queue"))
+        for unit in board.units:
+            self.assertEqual(len({full[i] for i in unit}), 16)
+        puzzle = ''.join('.' if i % 3 else c for i, c in enumerate(full))
+        for engine in ("bitmask", "dlx"):
+            values = solution.solve(puzzle, engine=engine, geometry=board)
+            self.assertTrue(all(c in '.' + values[box] for c, box in zip(puzzle, board.boxes)))
+
+    def test_strings_engine_rejects_geometry(self):
+        with self.assertRaises(ValueError):
+            solution.solve('.' * 16, geometry=Geometry(2))
+
+
+if __name__ == '__main__':
+    unittest.main()
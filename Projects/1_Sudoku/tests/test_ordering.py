@@ -0,0 +1,66 @@
+import unittest
+
+import benchmark
+import bitmask
+import ordering
+import solution
+from utils import Trace, grid2values
+
+
+class TestOrdering(unittest.TestCase):
+
+    def setUp(self):
+        self.hard = benchmark.load_corpus('hard')[:3]
+        self.unsolvable = benchmark.load_corpus('adversarial')[-1]
+
+    def test_policies_find_the_solution(self):
+        for grid in self.hard:
+            expected = solution.solve(grid, engine="bitmask")
+            for name in ordering.POLICIES:
+                for options in ({}, {"propagation": "queue"}, {"inplace": True}):
+                    self.assertEqual(solution.solve(grid, engine="bitmask", ordering=name, **options), expected)
+            self.assertFalse(solution.solve(self.unsolvable, engine="bitmask", ordering="restarts"))
+
+    def test_default_policy_matches_mrv(self):
+        for grid in self.hard:
+            default, mrv = bitmask.SearchStats(), bitmask.SearchStats()
+            solution.solve(grid, engine="bitmask", stats=default)
+            solution.solve(grid, engine="bitmask", stats=mrv, ordering="mrv")
+            self.assertEqual(default.as_dict(), mrv.as_dict())
+
+    def test_restarts(self):
+        policy = ordering.Ordering("mrv-random", "random", restarts=True, node_cap=2, seed=1)
+        for grid in self.hard:
+            stats, trace = bitmask.SearchStats(), Trace()
+            result = solution.solve(grid, engine="bitmask", ordering=policy, stats=stats, trace=trace)
+            self.assertGreater(stats.restarts, 0)
+            values = grid2values(grid)
+            for box, value in trace:
+                values[box] = value
+            self.assertEqual(values, result)
+
+    def test_degree_tiebreak(self):
+        masks = [solution.tables.full] * 81
+        masks[0] = masks[40] = 0b11
+        policy = ordering.Ordering("mrv-degree")
+        # the center box lies on both diagonals, so it has the most unsolved peers
+        self.assertEqual(policy.choose(masks, solution.tables, None), 40)
+        self.assertEqual(ordering.Ordering().choose(masks, solution.tables, None), 0)
+
+    def test_least_constraining_value(self):
+        masks = [solution.tables.full] * 81
+        masks[0] = 0b111
+        for p in solution.tables.peers[0][:5]:
+            masks[p] = 0b110
+        policy = ordering.Ordering(value="lcv")
+        self.assertEqual(policy.values(masks, solution.tables, 0, None), [0b001, 0b010, 0b100])
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            solution.solve(self.hard[0], engine="bitmask", ordering="fastest")
+        with self.assertRaises(ValueError):
+            ordering.Ordering(value="largest")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+
+import benchmark
+import bitmask
+import parallel
+import solution
+
+
+class TestParallelSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.hard = benchmark.load_corpus('hard')[0]
+        self.unsolvable = benchmark.load_corpus('adversarial')[-1]
+
+    def test_split_partitions_the_search(self):
+        expected = solution.tables.values2masks(solution.solve(self.hard, engine="bitmask"))
+        for depth in range(4):
+            frontier = bitmask.split(solution.tables.grid2masks(self.hard), solution.tables, depth)
+            self.assertTrue(frontier)
+            holding = [masks for masks in frontier
+                       if all(m & e for m, e in zip(masks, expected))]
+            self.assertEqual(len(holding), 1)
+
+    def test_in_process(self):
+        expected = solution.solve(self.hard, engine="bitmask")
+        self.assertEqual(parallel.solve_parallel(self.hard, depth=3, workers=1), expected)
+        self.assertFalse(parallel.solve_parallel(self.unsolvable, depth=3, workers=1))
+
+    def test_worker_pool(self):
+        expected = solution.solve(self.hard, engine="bitmask")
+        self.assertEqual(parallel.solve_parallel(self.hard, depth=2, workers=2, propagation="queue"), expected)
+        self.assertFalse(parallel.solve_parallel(self.unsolvable, depth=2, workers=2))
+
+    def test_trace_is_rejected(self):
+        with self.assertRaises(ValueError):
+            parallel.solve_parallel(self.hard, trace=[])
+
+
+if __name__ == '__main__':
+    unittest.main()
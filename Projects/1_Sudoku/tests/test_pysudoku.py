@@ -0,0 +1,60 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import solution
+from utils import Trace, grid2values
+
+try:
+    import pygame
+    import PySudoku
+except ImportError:
+    PySudoku = None
+
+
+@unittest.skipIf(PySudoku is None, "pygame is not installed")
+class TestReplay(unittest.TestCase):
+    diagonal_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+    def setUp(self):
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        self.trace = Trace()
+        self.solved = solution.solve(self.diagonal_grid, engine="bitmask", trace=self.trace)
+        self.output = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output)
+
+    def test_render_frames(self):
+        for speed in (1, 5):
+            output = os.path.join(self.output, str(speed))
+            count = PySudoku.render(grid2values(self.diagonal_grid), self.trace, output, speed=speed,
+                                    frame_format="bmp")
+            self.assertEqual(count, 1 + -(-len(self.trace) // speed))
+            self.assertEqual(len(os.listdir(output)), count)
+
+    def test_redraws_match_a_full_draw(self):
+        pygame.init()
+        self.addCleanup(pygame.quit)
+        screen = pygame.display.set_mode(PySudoku.SIZE)
+        board = PySudoku.Board(screen, grid2values(self.diagonal_grid))
+        assignments = iter(self.trace)
+        while board.advance(assignments, 7):
+            rects = board.redraw()
+            self.assertLessEqual(len(rects), 7)
+        board.redraw()
+        self.assertEqual(board.values, self.solved)
+        replayed = pygame.image.tostring(screen, "RGB")
+        PySudoku.Board(screen, dict(self.solved))
+        self.assertEqual(pygame.image.tostring(screen, "RGB"), replayed)
+
+    def test_unchanged_digit_is_not_redrawn(self):
+        pygame.init()
+        self.addCleanup(pygame.quit)
+        board = PySudoku.Board(pygame.display.set_mode(PySudoku.SIZE), grid2values(self.diagonal_grid))
+        board.apply('A1', '2')
+        board.apply('A2', '3456')
+        self.assertEqual(board.redraw(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
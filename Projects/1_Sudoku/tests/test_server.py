@@ -0,0 +1,86 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+import benchmark
+import server
+import solution
+from utils import values2grid
+
+
+def run(coroutine):
+    # asyncio.run is new in Python 3.7
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+        asyncio.set_event_loop(None)
+
+
+async def exchange(reader, writer, lines):
+    writer.write(''.join(line + '\n' for line in lines).encode())
+    await writer.drain()
+    # blank lines are not answered
+    return [(await reader.readline()).decode().rstrip('\n') for line in lines if line]
+
+
+class TestServer(unittest.TestCase):
+
+    def setUp(self):
+        self.grids = benchmark.load_corpus('hard')[:6]
+        self.expected = [values2grid(solution.solve(grid, engine="bitmask")) for grid in self.grids]
+        self.unsolvable = benchmark.load_corpus('adversarial')[-1]
+
+    def test_check_grid(self):
+        self.assertIsNone(server.check_grid(self.grids[0]))
+        self.assertIn("81", server.check_grid("..."))
+        self.assertIn("x", server.check_grid("x" * 81))
+
+    def test_tcp(self):
+        async def session():
+            async with server.SolveServer(workers=1, batch_size=4, delay=0.01) as solver:
+                listening = await solver.start()
+                host, port = listening.sockets[0].getsockname()[:2]
+                reader, writer = await asyncio.open_connection(host, port)
+                answers = await exchange(reader, writer, self.grids + ["", self.unsolvable, "123"])
+                # the connection stays open for more requests
+                again = await exchange(reader, writer, self.grids[:1])
+                writer.close()
+                return answers, again, solver.batches
+
+        answers, again, batches = run(session())
+        self.assertEqual(len(answers), len(self.grids) + 2)
+        for answer, expected in zip(answers, self.expected):
+            grid, solve_ms, total_ms = answer.split()
+            self.assertEqual(grid, expected)
+            self.assertLessEqual(float(solve_ms), float(total_ms))
+        self.assertEqual(answers[-2].split()[0], '-')
+        self.assertTrue(answers[-1].startswith("error "))
+        self.assertEqual(again[0].split()[0], self.expected[0])
+        self.assertLess(batches, len(self.grids) + 2)
+
+    @unittest.skipUnless(hasattr(asyncio, "start_unix_server"), "needs Unix sockets")
+    def test_unix_socket(self):
+        path = os.path.join(tempfile.mkdtemp(), "sudoku.sock")
+
+        async def session():
+            async with server.SolveServer(workers=1) as solver:
+                await solver.start(path=path)
+                clients = [await asyncio.open_unix_connection(path) for _ in range(3)]
+                answers = await asyncio.gather(*(exchange(reader, writer, self.grids[k::3])
+                                                 for k, (reader, writer) in enumerate(clients)))
+                for _, writer in clients:
+                    writer.close()
+                return answers
+
+        answers = run(session())
+        for k, lines in enumerate(answers):
+            self.assertEqual([line.split()[0] for line in lines], self.expected[k::3])
+        self.assertFalse(os.path.exists(path))
+
+
+if __name__ == '__main__':
+    unittest.main()
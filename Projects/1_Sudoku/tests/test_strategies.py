@@ -0,0 +1,53 @@
+import random
+import unittest
+
+import bitmask
+import solution
+import strategies
+from tests.test_solution import TestNakedTwins
+from utils import values2grid
+
+
+class TestStrategies(unittest.TestCase):
+    diagonal_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+    def test_naked_pairs_matches_naked_twins(self):
+        tables = solution.tables
+        for before, possible in [(TestNakedTwins.before_naked_twins_1, TestNakedTwins.possible_solutions_1),
+                                 (TestNakedTwins.before_naked_twins_2, TestNakedTwins.possible_solutions_2)]:
+            masks = tables.values2masks(before)
+            strategies.naked_pairs(masks, tables, [])
+            self.assertIn(tables.masks2values(masks), possible)
+
+    def test_strategies_keep_the_solution(self):
+        tables = solution.tables
+        full = values2grid(solution.solve(self.diagonal_grid))
+        rng = random.Random(0)
+        for _ in range(30):
+            puzzle = ''.join(c if rng.random() < 0.3 else '.' for c in full)
+            masks = tables.grid2masks(puzzle)
+            bitmask.reduce_puzzle(masks, tables)
+            for name, function in strategies.STRATEGIES.items():
+                reduced = masks[:]
+                function(reduced, tables, [])
+                for box, digit in zip(range(81), full):
+                    self.assertTrue(reduced[box] & tables.bits[digit], name)
+
+    def test_pipeline_counters(self):
+        pipeline = strategies.Pipeline(["naked_pairs", "pointing", "x_wing"])
+        for kwargs in ({}, {"propagation": "queue"}, {"inplace": True}):
+            self.assertEqual(solution.solve(self.diagonal_grid, engine="bitmask", strategies=pipeline, **kwargs),
+                             solution.solve(self.diagonal_grid))
+        stats = pipeline.stats()
+        self.assertEqual(list(stats), ["naked_pairs", "pointing", "x_wing"])
+        self.assertGreater(stats["naked_pairs"]["calls"], 0)
+        self.assertEqual(sum(s["eliminated"] for s in stats.values()),
+                         sum(s.eliminated for s in pipeline.strategies))
+
+    def test_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            strategies.Pipeline(["swordfish"])
+
+
+if __name__ == '__main__':
+    unittest.main()
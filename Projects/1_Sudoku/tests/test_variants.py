@@ -0,0 +1,123 @@
+import random
+import unittest
+
+import generator
+import solution
+import variants
+from geometry import Geometry
+
+try:
+    import vectorized
+except ImportError:
+    vectorized = None
+
+
+def valid(values, board):
+    """Return True if a solved board satisfies its units and cages """
+    grid = ''.join(values[box] for box in board.boxes)
+    if any(sorted(grid[i] for i in unit) != sorted(board.digits) for unit in board.units):
+        return False
+    for boxes, total, _ in getattr(board, "cages", ()):
+        if sum(board.digits.index(grid[i]) + 1 for i in boxes) != total:
+            return False
+        if len(set(grid[i] for i in boxes)) != len(boxes):
+            return False
+    return True
+
+
+class TestSumCombinations(unittest.TestCase):
+
+    def test_combinations(self):
+        self.assertEqual(variants.sum_combinations(9, 2, 3), (0b11,))
+        self.assertEqual(variants.sum_combinations(9, 2, 17), (0b110000000,))
+        self.assertEqual(len(variants.sum_combinations(9, 3, 15)), 8)
+        self.assertEqual(variants.sum_combinations(9, 9, 45), (0b111111111,))
+        self.assertEqual(variants.sum_combinations(9, 2, 2), ())
+        self.assertEqual(variants.sum_combinations(9, 10, 45), ())
+
+    def test_large_boards(self):
+        # only the combinations of the cage size are enumerated
+        self.assertEqual(variants.sum_combinations(25, 2, 49), ((1 << 24) | (1 << 23),))
+        board = variants.Killer([(("A1", "A2"), 3)], board=Geometry(5))
+        self.assertEqual(board.cages[0][2], (0b11,))
+
+
+class TestJigsaw(unittest.TestCase):
+
+    def setUp(self):
+        self.classic = Geometry(3, diagonal=False)
+        self.target = generator.random_solution(self.classic, random.Random(5))
+        self.grid = self.classic.masks2grid(self.target)
+
+    def layout(self):
+        # swapping two boxes with the same digit between squares keeps every
+        # digit once per region, so the target stays a solution
+        labels = [chr(ord('A') + r // 3 * 3 + c // 3) for r in range(9) for c in range(9)]
+        for a in (0, 40, 80):
+            b = next(i for i in range(81) if self.grid[i] == self.grid[a] and labels[i] != labels[a])
+            labels[a], labels[b] = labels[b], labels[a]
+        return ''.join(labels)
+
+    def test_square_layout_matches_geometry(self):
+        labels = ''.join(chr(ord('A') + r // 3 * 3 + c // 3) for r in range(9) for c in range(9))
+        board = variants.Jigsaw(labels)
+        self.assertEqual([set(p) for p in board.peers], [set(p) for p in self.classic.peers])
+
+    def test_solve(self):
+        board = variants.Jigsaw(self.layout())
+        puzzle = ''.join(d if i % 2 else '.' for i, d in enumerate(self.grid))
+        for engine in ("bitmask", "dlx"):
+            values = solution.solve(puzzle, engine=engine, geometry=board)
+            self.assertTrue(valid(values, board))
+            self.assertTrue(all(values[board.boxes[i]] == puzzle[i] for i in range(81) if puzzle[i] != '.'))
+
+    def test_bad_layout(self):
+        with self.assertRaises(ValueError):
+            variants.Jigsaw("A" * 80)
+        with self.assertRaises(ValueError):
+            variants.Jigsaw("AB" * 40 + "C")
+
+
+class TestKiller(unittest.TestCase):
+
+    def setUp(self):
+        classic = Geometry(3, diagonal=False)
+        grid = classic.masks2grid(generator.random_solution(classic, random.Random(3)))
+        # dominoes along each row, with the last box of the row on its own
+        self.cages = []
+        for r in range(9):
+            for c in range(0, 9, 2):
+                boxes = [r * 9 + k for k in range(c, min(c + 2, 9))]
+                self.cages.append(([classic.boxes[i] for i in boxes], sum(int(grid[i]) for i in boxes)))
+        self.board = variants.Killer(self.cages)
+
+    def test_solve(self):
+        for options in ({}, {"propagation": "queue"}, {"inplace": True}, {"ordering": "mrv-degree-lcv"}):
+            self.assertTrue(valid(solution.solve('.' * 81, engine="bitmask", geometry=self.board, **options),
+                                  self.board))
+        for values in solution.iter_solutions('.' * 81, geometry=self.board):
+            self.assertTrue(valid(values, self.board))
+
+    def test_cages_without_strategy(self):
+        # the cage sums are enforced even when the caller asks for no strategies
+        values = solution.solve('.' * 81, engine="bitmask", geometry=self.board, strategies=[])
+        self.assertTrue(valid(values, self.board))
+
+    def test_other_engines_reject_cages(self):
+        with self.assertRaises(ValueError):
+            solution.solve('.' * 81, engine="dlx", geometry=self.board)
+
+    @unittest.skipIf(vectorized is None, "numpy is not installed")
+    def test_vectorized_rejects_cages(self):
+        with self.assertRaisesRegex(ValueError, "strategies"):
+            vectorized.solve_batch(['.' * 81], self.board)
+
+    def test_bad_cages(self):
+        with self.assertRaises(ValueError):
+            variants.Killer([(("A1", "A2"), 2)])
+        with self.assertRaises(ValueError):
+            variants.Killer([(("A1", "A1"), 3)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+
+import solution
+from utils import values2grid
+
+try:
+    import numpy as np
+    import vectorized
+except ImportError:
+    vectorized = None
+
+
+@unittest.skipIf(vectorized is None, "numpy is not installed")
+class TestVectorizedPropagation(unittest.TestCase):
+    diagonal_grid = '2.............62....1....7...6..8...3...9...7...6..4...4....8....52.............3'
+
+    def setUp(self):
+        self.solved = values2grid(solution.solve(self.diagonal_grid))
+
+    def test_propagation_solves_easy_boards(self):
+        grids = [self.solved[:60] + '.' * 21, ''.join('.' if i % 2 else c for i, c in enumerate(self.solved))]
+        masks = np.array([solution.tables.grid2masks(g) for g in grids], dtype=np.uint16)
+        masks, failed = vectorized.propagate(masks, solution.tables)
+        self.assertFalse(failed.any())
+        self.assertEqual([solution.tables.masks2grid(row) for row in masks.tolist()], [self.solved] * 2)
+
+    def test_solve_batch(self):
+        grids = [self.diagonal_grid, '22' + '.' * 79, self.solved[:50] + '.' * 31]
+        self.assertEqual(vectorized.solve_batch(grids, solution.tables), [self.solved, None, self.solved])
+        self.assertEqual(vectorized.solve_batch([], solution.tables), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
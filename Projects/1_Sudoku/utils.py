@@ -1,11 +1,11 @@
 
+from array import array
 from collections import defaultdict
 
 
 rows = 'ABCDEFGHI'
 cols = '123456789'
 boxes = [r + c for r in rows for c in cols]
-history = {}  # history must be declared here so that it exists in the assign_values scope
 
 
 def extract_units(unitlist, boxes):
@@ -27,11 +27,12 @@ def extract_units(unitlist, boxes):
     """
     # the value for keys that aren't in the dictionary are initialized as an empty list
     units = defaultdict(list)
-    for current_box in boxes:
-        for unit in unitlist:
-            if current_box in unit:
-                # defaultdict avoids this raising a KeyError when new keys are added
-                units[current_box].append(unit)
+    # visiting each unit once keeps the units of every box in unitlist order
+    # without testing every box for membership in every unit
+    for unit in unitlist:
+        for current_box in unit:
+            # defaultdict avoids this raising a KeyError when new keys are added
+            units[current_box].append(unit)
     return units
 
 
@@ -55,27 +56,87 @@ def extract_peers(units, boxes):
         containing all boxes that are peers of the key box (boxes that are in a unit
         together with the key box)
     """
-    # the value for keys that aren't in the dictionary are initialized as an empty list
+    # the value for keys that aren't in the dictionary are initialized as an empty set
     peers = defaultdict(set)  # set avoids duplicates
     for key_box in boxes:
-        for unit in units[key_box]:
-            for peer_box in unit:
-                if peer_box != key_box:
-                    # defaultdict avoids this raising a KeyError when new keys are added
-                    peers[key_box].add(peer_box)
+        # the member units from extract_units are all the boxes that can be peers,
+        # so their union (less the key box) is built without testing each box
+        peers[key_box] = set().union(*units[key_box]) - {key_box}
     return peers
 
 
-def assign_value(values, box, value):
+class Trace:
+    """A compact, append-only log of the assignments made while solving one
+    puzzle, for replaying the solve (e.g. with PySudoku.play)
+
+    Each entry is a (box, candidates) pair stored as two integers (the box
+    index and the candidate bitmask), so recording is O(1) and a trace holds
+    no references to board states. A trace belongs to a single solve and is
+    dropped with it. Searches call mark() before trying a branch and rewind()
+    when the branch fails, so a finished trace only holds the assignments
+    on the path to the solution.
+    """
+    def __init__(self, boxes=boxes, digits=cols):
+        """
+        Parameters
+        ----------
+        boxes(list)
+            the box names of the board, in board order
+
+        digits(str)
+            the digit symbols of the board
+        """
+        self.boxes = boxes
+        self.digits = digits
+        self._index = {box: i for i, box in enumerate(boxes)}
+        self._bits = {d: 1 << k for k, d in enumerate(digits)}
+        self._buffer = array('L')
+
+    def append(self, i, mask):
+        """Record that box number i now has the candidates in `mask` """
+        self._buffer.append(i)
+        self._buffer.append(mask)
+
+    def record(self, box, value):
+        """Record that `box` now has the candidate digits in the string `value` """
+        mask = 0
+        for d in value:
+            mask |= self._bits[d]
+        self.append(self._index[box], mask)
+
+    def mark(self):
+        """Return a position that rewind() can roll the trace back to """
+        return len(self._buffer)
+
+    def rewind(self, mark):
+        """Drop every entry recorded after `mark` """
+        del self._buffer[mark:]
+
+    def __len__(self):
+        return len(self._buffer) // 2
+
+    def __iter__(self):
+        """Yield the recorded (box, value) assignments in order """
+        buffer, digits = self._buffer, self.digits
+        for k in range(0, len(buffer), 2):
+            mask = buffer[k + 1]
+            yield self.boxes[buffer[k]], ''.join(d for j, d in enumerate(digits) if mask >> j & 1)
+
+
+def assign_value(values, box, value, trace=None):
     """You must use this function to update your values dictionary if you want to
     try using the provided visualization tool. This function records each assignment
-    (in order) for later reconstruction.
+    (in order) in `trace` for later replay.
 
     Parameters
     ----------
     values(dict)
         a dictionary of the form {'box_name': '123456789', ...}
 
+    trace(Trace)
+        the log to record single-digit assignments in; nothing is recorded
+        when it is None
+
     Returns
     -------
     dict
@@ -85,10 +146,9 @@ def assign_value(values, box, value):
     if values[box] == value:
         return values
 
-    prev = values2grid(values)
     values[box] = value
-    if len(value) == 1:
-        history[values2grid(values)] = (prev, (box, value))
+    if trace is not None and len(value) == 1:
+        trace.record(box, value)
     return values
 
 def cross(A, B):
@@ -158,30 +218,3 @@ def display(values):
                       for c in cols))
         if r in 'CF': print(line)
     print()
-
-
-def reconstruct(values, history):
-    """Returns the solution as a sequence of value assignments 
-
-    Parameters
-    ----------
-    values(dict)
-        a dictionary of the form {'box_name': '123456789', ...}
-
-    history(dict)
-        a dictionary of the form {key: (key, (box, value))} encoding a linked
-        list where each element points to the parent and identifies the value
-        assignment that connects from the parent to the current state
-
-    Returns
-    -------
-    list
-        a list of (box, value) assignments that can be applied in order to the
-        starting Sudoku puzzle to reach the solution
-    """
-    path = []
-    prev = values2grid(values)
-    while prev in history:
-        prev, step = history[prev]
-        path.append(step)
-    return path[::-1]
@@ -0,0 +1,128 @@
+"""Jigsaw and killer Sudoku boards
+
+Both variants compile into the same IndexTables the bitmask engine runs on,
+so they are solved by the same propagation and search as classic boards:
+
+    Jigsaw  the squares are replaced by irregular regions, which are units
+            like any other (so the dlx and vectorized engines solve jigsaw
+            boards too)
+    Killer  the boxes of each cage must hold distinct digits, so they are
+            added to each other's peers, and the digits must add up to the
+            cage sum. Each cage keeps the combinations of distinct digits
+            of its size that make its sum, computed once per digit count,
+            cage size and sum, and the "cages" strategy (see strategies.py)
+            prunes the candidates of the cage to the combinations that still
+            fit. Cages are not units: a unit must hold every digit.
+
+    board = Killer([(("A1", "A2"), 3), (("A3", "B3", "C3"), 24), ...])
+    solution.solve('.' * 81, engine="bitmask", geometry=board)
+"""
+from functools import lru_cache
+from itertools import combinations
+
+import bitmask
+from geometry import DIGITS, ROW_LABELS, Geometry
+
+
+@lru_cache(maxsize=None)
+def sum_combinations(ndigits, size, total):
+    """Return the combinations of `size` distinct digits that add up to `total`
+
+    Digit k (bit k of a candidate mask) counts as the number k + 1. Only the
+    combinations of one cage size are enumerated, so large boards stay cheap.
+
+    Returns
+    -------
+    tuple
+        the candidate masks of the digit combinations, in increasing order
+        (empty if no combination makes the sum)
+    """
+    if not 0 < size <= ndigits:
+        return ()
+    masks = (sum(1 << k for k in digits) for digits in combinations(range(ndigits), size)
+             if sum(digits) + size == total)
+    return tuple(sorted(masks))
+
+
+class Jigsaw(bitmask.IndexTables):
+    """Unit and peer tables for a board with irregular regions
+
+    Attributes
+    ----------
+    size : int
+        the number of digits, and of boxes in each row, column and region
+
+    regions : list
+        the regions as tuples of box indices, in order of their labels
+    """
+    def __init__(self, regions, diagonal=False):
+        """
+        Parameters
+        ----------
+        regions(str)
+            one region label per box, row by row (e.g. "AAABBBCCC..." for a
+            9x9 board); every label must mark `size` boxes
+
+        diagonal(bool)
+            add the two main diagonals as units
+        """
+        size = int(round(len(regions) ** 0.5))
+        if size * size != len(regions) or not 2 <= size <= len(DIGITS):
+            raise ValueError("A jigsaw layout needs one label per box of a square board")
+        labels = sorted(set(regions))
+        self.size = size
+        self.regions = [tuple(i for i, label in enumerate(regions) if label == l) for l in labels]
+        if len(self.regions) != size or any(len(region) != size for region in self.regions):
+            raise ValueError("A {0}x{0} jigsaw board needs {0} regions of {0} boxes".format(size))
+        boxes = [r + str(c + 1) for r in ROW_LABELS[:size] for c in range(size)]
+        units = [tuple(r * size + c for c in range(size)) for r in range(size)]
+        units += [tuple(r * size + c for r in range(size)) for c in range(size)]
+        units += self.regions
+        if diagonal:
+            units.append(tuple(i * size + i for i in range(size)))
+            units.append(tuple((size - 1 - i) * size + i for i in range(size)))
+        peers = [set() for _ in boxes]
+        for unit in units:
+            for i in unit:
+                peers[i].update(unit)
+        self._build(boxes, units, [tuple(sorted(p - {i})) for i, p in enumerate(peers)], DIGITS[:size])
+
+
+class Killer(bitmask.IndexTables):
+    """Unit, peer and cage tables for a killer Sudoku board
+
+    Attributes
+    ----------
+    cages : list
+        (boxes, total, combinations) tuples: the box indices of a cage, its
+        sum, and the candidate masks of the digit combinations that make it
+    """
+    def __init__(self, cages, board=None):
+        """
+        Parameters
+        ----------
+        cages(list)
+            (boxes, total) pairs, where boxes is a sequence of box names
+            (e.g. ("A1", "A2")) and total is the sum of their digits
+
+        board(IndexTables)
+            the layout the cages are added to; defaults to the classic 9x9
+            board without diagonals (pass a Geometry or Jigsaw for others)
+        """
+        board = Geometry(3, diagonal=False) if board is None else board
+        ndigits = len(board.digits)
+        peers = [set(p) for p in board.peers]
+        self.cages = []
+        for names, total in cages:
+            boxes = tuple(board.index[name] for name in names)
+            if len(set(boxes)) != len(boxes):
+                raise ValueError("Cage {} lists a box twice".format(list(names)))
+            masks = sum_combinations(ndigits, len(boxes), total)
+            if not masks:
+                raise ValueError("No {} distinct digits add up to {}".format(len(boxes), total))
+            self.cages.append((boxes, total, masks))
+            for i in boxes:
+                peers[i].update(boxes)
+        self._build(board.boxes, board.units, [tuple(sorted(p - {i})) for i, p in enumerate(peers)],
+                    board.digits)
+        self.strategies = ["cages"] + [name for name in board.strategies or () if name != "cages"]
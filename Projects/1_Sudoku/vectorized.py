@@ -0,0 +1,147 @@
+"""NumPy-vectorized constraint propagation over batches of Sudoku boards
+
+A batch of N boards is stored as an (N, boxes) array of candidate masks (the
+same bit layout as bitmask.py), and the eliminate and only_choice rules run as
+array operations over every board at once. Boards that propagation alone does
+not finish fall back to the scalar bitmask search.
+
+This module requires numpy.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+import bitmask
+
+
+class BatchTables:
+    """Padded NumPy index arrays for an IndexTables board layout
+
+    Attributes
+    ----------
+    peers : ndarray
+        (boxes, max peers) array of peer indices, padded with `boxes`, which
+        indexes an extra all-zero column appended to the board
+
+    units : ndarray
+        (units, unit size) array of the box indices in each unit
+
+    slots : ndarray
+        (boxes, max units per box) array of positions in the flattened
+        (units * unit size) view of a board gathered by `units`, padded with
+        an index past the end that points at an extra all-ones column
+    """
+    def __init__(self, tables):
+        n = len(tables.boxes)
+        self.dtype = np.uint16 if len(tables.digits) <= 16 else np.uint32
+        self.full = self.dtype(tables.full)
+        if tables.strategies:
+            raise ValueError("Vectorized propagation does not run the strategies {} the board needs".format(
+                tables.strategies))
+        if len(set(map(len, tables.units))) != 1:
+            raise ValueError("Vectorized propagation needs units of equal size")
+        self.units = np.array(tables.units, dtype=np.intp)
+        self.peers = _padded(tables.peers, n)
+        slots = [[] for _ in range(n)]
+        for u, unit in enumerate(tables.units):
+            for k, i in enumerate(unit):
+                slots[i].append(u * len(unit) + k)
+        self.slots = _padded(slots, self.units.size)
+
+
+def _padded(rows, fill):
+    out = np.full((len(rows), max(map(len, rows))), fill, dtype=np.intp)
+    for i, row in enumerate(rows):
+        out[i, :len(row)] = row
+    return out
+
+
+batch_tables = lru_cache()(BatchTables)
+
+
+def propagate(masks, tables):
+    """Run eliminate and only_choice over a batch of boards until none change
+
+    Only the boards that changed in the previous round are processed again.
+
+    Parameters
+    ----------
+    masks(ndarray)
+        (N, boxes) array of candidate masks; it is updated in place
+
+    tables(IndexTables)
+        the index tables for the board layout
+
+    Returns
+    -------
+    (ndarray, ndarray)
+        The masks array and a boolean array flagging the boards that hit a
+        contradiction (a box with no candidates or a digit with no place in
+        a unit)
+    """
+    bt = batch_tables(tables)
+    full, dtype = bt.full, bt.dtype
+    failed = np.zeros(len(masks), dtype=bool)
+    rows = np.arange(len(masks))
+    while rows.size:
+        board = masks[rows]
+        before = board.copy()
+
+        # eliminate: clear the digit of every solved peer
+        single = (board & (board - dtype(1))) == 0
+        solved = np.where(single, board, dtype(0))
+        solved = np.concatenate([solved, np.zeros((len(rows), 1), dtype)], axis=1)
+        board &= ~np.bitwise_or.reduce(solved[:, bt.peers], axis=2)
+
+        # only_choice: digits seen exactly once in a unit go to that box
+        cells = board[:, bt.units]
+        once = np.zeros(cells.shape[:2], dtype)
+        twice = np.zeros(cells.shape[:2], dtype)
+        for k in range(cells.shape[2]):
+            twice |= once & cells[:, :, k]
+            once |= cells[:, :, k]
+        hidden = cells & (once & ~twice)[:, :, None]
+        clash = (hidden & (hidden - dtype(1))) != 0
+        keep = np.where(clash | (hidden != 0), np.where(clash, dtype(0), hidden), full)
+        keep = np.concatenate([keep.reshape(len(rows), -1), np.full((len(rows), 1), full, dtype)], axis=1)
+        board &= np.bitwise_and.reduce(keep[:, bt.slots], axis=2)
+
+        masks[rows] = board
+        bad = (board == 0).any(axis=1) | (once != full).any(axis=1)
+        failed[rows[bad]] = True
+        rows = rows[(board != before).any(axis=1) & ~bad]
+    return masks, failed
+
+
+def solve_batch(grids, tables, propagation="queue"):
+    """Solve a list of grid strings, propagating constraints for the whole
+    batch with array operations and searching the leftovers one at a time
+
+    Parameters
+    ----------
+    grids(list)
+        grid strings for the board layout described by `tables`
+
+    tables(IndexTables)
+        the index tables for the board layout
+
+    propagation(str)
+        propagation mode of the scalar bitmask.search fallback
+
+    Returns
+    -------
+    list
+        The solved grid string for each input grid, in input order, or None
+        for puzzles without a solution
+    """
+    if not len(grids):
+        return []
+    bt = batch_tables(tables)
+    masks = np.array([tables.grid2masks(grid) for grid in grids], dtype=bt.dtype)
+    masks, failed = propagate(masks, tables)
+    results = []
+    for board, bad in zip(masks.tolist(), failed.tolist()):
+        if not bad and any(m & (m - 1) for m in board):
+            board = bitmask.search(board, tables, propagation)
+        results.append(None if bad or board is False else tables.masks2grid(board))
+    return results
@@ -159,3 +159,43 @@ def decode_state(state, fluent_map):
         else:
             fs.neg.append(fluent_map[idx])
     return fs
+
+
+def pack_state(state):
+    """ Convert an ordered sequence of True/False values into an int bitset
+
+    The first fluent is the most significant bit, so packed states compare
+    (e.g., to break ties in a priority queue) in the same order as the tuples
+    they were packed from.
+
+    Parameters
+    ----------
+    state:
+        A state represented as an ordered sequence of True/False values
+
+    Returns
+    -------
+    int with bit len(state) - 1 - i set for each True entry i of the input state
+    """
+    bits = 0
+    for elem in state:
+        bits = bits << 1 | bool(elem)
+    return bits
+
+
+def unpack_state(bits, size):
+    """ Convert an int bitset made by pack_state back into a tuple of True/False values
+
+    Parameters
+    ----------
+    bits:
+        A state represented as an int bitset
+
+    size:
+        The number of fluents in the state (i.e., len(fluent_map))
+
+    Returns
+    -------
+    tuple of True/False elements corresponding to the fluents in the fluent map
+    """
+    return tuple(bool(bits >> (size - 1 - idx) & 1) for idx in range(size))
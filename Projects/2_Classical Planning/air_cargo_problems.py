@@ -13,7 +13,7 @@ from planning_problem import BasePlanningProblem
 
 
 class AirCargoProblem(BasePlanningProblem):
-    def __init__(self, cargos, planes, airports, initial, goal):
+    def __init__(self, cargos, planes, airports, initial, goal, bitset=False, compiled_graph=False):
         """
         Parameters
         ----------
@@ -35,8 +35,15 @@ class AirCargoProblem(BasePlanningProblem):
             A collection of literal fluents describing the goal state of
             the problem (each fluent should be an instance of the
             `aimacode.utils.Expr` class)
+
+        bitset : bool
+            Represent states as int bitsets (see BasePlanningProblem)
+
+        compiled_graph : bool
+            Use the compiled planning graph in the h_pg_* heuristics (see
+            BasePlanningProblem)
         """
-        super().__init__(initial, goal)
+        super().__init__(initial, goal, bitset, compiled_graph)
         self.cargos = cargos
         self.planes = planes
         self.airports = airports
@@ -126,7 +133,7 @@ class AirCargoProblem(BasePlanningProblem):
         return load_actions() + unload_actions() + fly_actions()
 
 
-def air_cargo_p1():
+def air_cargo_p1(bitset=False, compiled_graph=False):
     cargos = ['C1', 'C2']
     planes = ['P1', 'P2']
     airports = ['JFK', 'SFO']
@@ -140,10 +147,10 @@ def air_cargo_p1():
         ])
     init = FluentState(pos, [r for r in at_relations + in_relations if r not in pos])
     goal = create_expressions(['At(C1, JFK)', 'At(C2, SFO)'])
-    return AirCargoProblem(cargos, planes, airports, init, goal)
+    return AirCargoProblem(cargos, planes, airports, init, goal, bitset, compiled_graph)
 
 
-def air_cargo_p2():
+def air_cargo_p2(bitset=False, compiled_graph=False):
     cargos = ['C1', 'C2', 'C3']
     planes = ['P1', 'P2', 'P3']
     airports = ['JFK', 'SFO', 'ATL']
@@ -159,10 +166,10 @@ def air_cargo_p2():
     ])
     init = FluentState(pos, [r for r in at_relations + in_relations if r not in pos])
     goal = create_expressions(['At(C1, JFK)', 'At(C2, SFO)', 'At(C3, SFO)'])
-    return AirCargoProblem(cargos, planes, airports, init, goal)
+    return AirCargoProblem(cargos, planes, airports, init, goal, bitset, compiled_graph)
 
 
-def air_cargo_p3():
+def air_cargo_p3(bitset=False, compiled_graph=False):
     cargos = ['C1', 'C2', 'C3', 'C4']
     planes = ['P1', 'P2']
     airports = ['JFK', 'SFO', 'ATL', 'ORD']
@@ -178,10 +185,10 @@ def air_cargo_p3():
     ])
     init = FluentState(pos, [r for r in at_relations + in_relations if r not in pos])
     goal = create_expressions(['At(C1, JFK)', 'At(C2, SFO)', 'At(C3, JFK)', 'At(C4, SFO)'])
-    return AirCargoProblem(cargos, planes, airports, init, goal)
+    return AirCargoProblem(cargos, planes, airports, init, goal, bitset, compiled_graph)
 
 
-def air_cargo_p4():
+def air_cargo_p4(bitset=False, compiled_graph=False):
     cargos = ['C1', 'C2', 'C3', 'C4', 'C5']
     planes = ['P1', 'P2']
     airports = ['JFK', 'SFO', 'ATL', 'ORD']
@@ -198,4 +205,4 @@ def air_cargo_p4():
     ])
     init = FluentState(pos, [r for r in at_relations + in_relations if r not in pos])
     goal = create_expressions(['At(C1, JFK)', 'At(C2, SFO)', 'At(C3, JFK)', 'At(C4, SFO)', 'At(C5, JFK)'])
-    return AirCargoProblem(cargos, planes, airports, init, goal)
+    return AirCargoProblem(cargos, planes, airports, init, goal, bitset, compiled_graph)
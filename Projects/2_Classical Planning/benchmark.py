@@ -0,0 +1,111 @@
+"""Benchmark the inconsistent support test of the planning graph on the air cargo problems
+
+For each problem, planning graphs (serialized, with mutexes) are filled from
+the initial state and from states reached by a few actions, and every pair of
+literals in every literal layer is tested for inconsistent support twice:
+
+    pairwise      scan every pair of actions in the parent layer for two
+                  non-mutex actions that support the two literals
+    support-sets  LiteralLayer._inconsistent_support, which intersects the
+                  bitset of the supporters of one literal with the bitset of
+                  the companions of the supporters of the other
+
+The two must agree on every pair. The times of both are printed along with
+the time of a whole h_setlevel call with PlanningGraph and with
+CompiledPlanningGraph.
+
+    python benchmark.py                  # air_cargo_p1 and air_cargo_p2
+    python benchmark.py -p 1 2 3 -n 3    # three states per problem
+
+The pairwise scan takes minutes per graph on air_cargo_p3 and air_cargo_p4.
+"""
+import argparse
+
+from itertools import combinations
+from timeit import default_timer as timer
+
+from air_cargo_problems import air_cargo_p1, air_cargo_p2, air_cargo_p3, air_cargo_p4
+from compiled_graph import CompiledPlanningGraph
+from my_planning_graph import PlanningGraph
+
+
+PROBLEMS = {1: air_cargo_p1, 2: air_cargo_p2, 3: air_cargo_p3, 4: air_cargo_p4}
+
+
+def pairwise_inconsistent_support(layer, literalA, literalB):
+    """ The pairwise scan of the original LiteralLayer._inconsistent_support """
+    for actionA, actionB in combinations(layer.parent_layer, 2):
+        if not layer.parent_layer.is_mutex(actionA, actionB):
+            if (literalA in actionA.effects and literalB in actionB.effects) or (
+                    literalA in actionB.effects and literalB in actionA.effects):
+                return False
+    return True
+
+
+def sample_states(problem, count):
+    """ Return the initial state and the states reached by taking a few actions from it """
+    states, state = [problem.initial], problem.initial
+    while len(states) < count:
+        actions = problem.actions(state)
+        state = problem.result(state, actions[len(states) % len(actions)])
+        states.append(state)
+    return states
+
+
+def run(number, count=1):
+    """ Time both inconsistent support tests on the graphs of one problem
+
+    Returns
+    -------
+    dict
+        The number of literal pairs tested, the seconds spent by each test,
+        and the seconds per h_setlevel call with each planning graph
+    """
+    problem = PROBLEMS[number]()
+    states = sample_states(problem, count)
+    result = {"problem": "air_cargo_p{}".format(number), "pairs": 0, "pairwise": 0.0, "support-sets": 0.0}
+    for state in states:
+        graph = PlanningGraph(problem, state).fill()
+        for layer in graph.literal_layers[1:]:
+            pairs = list(combinations(layer, 2))
+            start = timer()
+            expected = [pairwise_inconsistent_support(layer, a, b) for a, b in pairs]
+            middle = timer()
+            layer._support = None
+            found = [layer._inconsistent_support(a, b) for a, b in pairs]
+            end = timer()
+            if found != expected:
+                raise AssertionError("The support sets disagree with the pairwise scan on {}".format(
+                    result["problem"]))
+            result["pairs"] += len(pairs)
+            result["pairwise"] += middle - start
+            result["support-sets"] += end - middle
+    for graph in (PlanningGraph, CompiledPlanningGraph):
+        start = timer()
+        for state in states:
+            graph(problem, state).h_setlevel()
+        result[graph.__name__] = (timer() - start) / len(states)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the inconsistent support test of the " +
+        "planning graph on the air cargo problems.")
+    parser.add_argument('-p', '--problems', nargs='+', type=int, choices=sorted(PROBLEMS), default=[1, 2],
+                        help="Air cargo problems to run (default: 1 2)")
+    parser.add_argument('-n', '--states', type=int, default=1,
+                        help="Number of states to build planning graphs from, per problem")
+    args = parser.parse_args(argv)
+
+    print("{:<14}{:>10}{:>14}{:>14}{:>10}{:>20}{:>20}".format(
+        "problem", "pairs", "pairwise s", "support s", "speedup", "PlanningGraph s", "Compiled s"))
+    for number in args.problems:
+        r = run(number, args.states)
+        print("{:<14}{:>10}{:>14.3f}{:>14.3f}{:>9.0f}x{:>20.3f}{:>20.4f}".format(
+            r["problem"], r["pairs"], r["pairwise"], r["support-sets"],
+            r["pairwise"] / max(r["support-sets"], 1e-9), r["PlanningGraph"], r["CompiledPlanningGraph"]),
+            flush=True)
+
+
+if __name__ == "__main__":
+    main()
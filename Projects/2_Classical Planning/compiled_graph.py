@@ -0,0 +1,283 @@
+from itertools import chain
+from weakref import WeakKeyDictionary
+
+from layers import makeNoOp, make_node
+
+
+def bits(mask):
+    """ Yield the positions of the set bits of an int, lowest first """
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class GraphIndex:
+    """ The literals and actions of a planning problem, numbered once so that
+    planning graph layers can be stored as int bitsets
+
+    Attributes
+    ----------
+    literals : list
+        The literal aimacode.utils.Expr of each literal number. Literal 2i is
+        a positive literal and 2i + 1 its negation, so the negation of literal
+        l is l ^ 1. The fluents of problem.state_map come first, followed by
+        any other atom used by an action or the goal.
+
+    actions : list
+        The layers.ActionNode of each action number: the no-op actions of
+        every fluent (in the order PlanningGraph makes them), then the actions
+        of problem.actions_list
+
+    preconditions, effects : list
+        The literal masks of the preconditions and effects of each action
+
+    achievers, consumers : list
+        The action masks of the actions with each literal as an effect, and
+        as a precondition
+
+    static_mutexes : list
+        The action mask of the actions that each action is always mutex with,
+        because their effects are inconsistent or they interfere; this only
+        depends on the action definitions, so it holds in every layer
+
+    static_table : dict
+        The static mutexes as a mapping from each layers.ActionNode to the
+        frozenset of the nodes it is always mutex with, for the object
+        planning graph layers (see layers.BaseActionLayer)
+
+    no_ops : int
+        The action mask of the no-op actions
+
+    goal, goals : frozenset, int
+        The goal literals of the problem, and their literal mask
+    """
+    _cache = WeakKeyDictionary()
+
+    @classmethod
+    def of(cls, problem):
+        """ Return the index of a problem, numbering it on the first call """
+        index = cls._cache.get(problem)
+        if index is None:
+            index = cls._cache[problem] = cls(problem)
+        return index
+
+    def __init__(self, problem):
+        no_ops = [make_node(n, no_op=True) for n in chain(*(makeNoOp(s) for s in problem.state_map))]
+        self.actions = []
+        seen = set()
+        for node in no_ops + [make_node(a) for a in problem.actions_list]:
+            if node not in seen:
+                seen.add(node)
+                self.actions.append(node)
+
+        atoms = list(problem.state_map)
+        known = set(atoms)
+        for literal in chain(*(chain(a.preconditions, a.effects) for a in self.actions), problem.goal):
+            atom = literal.args[0] if literal.op == '~' else literal
+            if atom not in known:
+                known.add(atom)
+                atoms.append(atom)
+        self.literals = list(chain(*((atom, ~atom) for atom in atoms)))
+        self.number = {literal: l for l, literal in enumerate(self.literals)}
+        # the positive and negative literal masks of each fluent of the state map
+        self.fluents = [(1 << 2 * i, 1 << 2 * i + 1) for i in range(len(problem.state_map))]
+
+        def mask(literals):
+            return sum(1 << self.number[literal] for literal in set(literals))
+
+        self.preconditions = [mask(a.preconditions) for a in self.actions]
+        self.effects = [mask(a.effects) for a in self.actions]
+        self.no_ops = sum(1 << a for a, node in enumerate(self.actions) if node.no_op)
+        self.achievers = [0] * len(self.literals)
+        self.consumers = [0] * len(self.literals)
+        for a in range(len(self.actions)):
+            for l in bits(self.effects[a]):
+                self.achievers[l] |= 1 << a
+            for l in bits(self.preconditions[a]):
+                self.consumers[l] |= 1 << a
+
+        self.static_mutexes = []
+        for a in range(len(self.actions)):
+            row = 0
+            # inconsistent effects, and effects that negate a precondition
+            for l in bits(self.effects[a]):
+                row |= self.achievers[l ^ 1] | self.consumers[l ^ 1]
+            # preconditions negated by an effect
+            for l in bits(self.preconditions[a]):
+                row |= self.achievers[l ^ 1]
+            self.static_mutexes.append(row & ~(1 << a))
+        self.static_table = {node: frozenset(self.actions[b] for b in bits(row))
+                             for node, row in zip(self.actions, self.static_mutexes)}
+
+        self.goal = frozenset(problem.goal)
+        self.goals = mask(self.goal)
+
+    def initial_literals(self, state):
+        """ Return the literal mask of a state given as a tuple of True/False values """
+        return sum(pos if f else neg for f, (pos, neg) in zip(state, self.fluents))
+
+
+class CompiledPlanningGraph:
+    """ A planning graph over the numbered literals and actions of a GraphIndex
+
+    Builds the same graph as my_planning_graph.PlanningGraph, and returns the
+    same heuristic values, but every layer is an int bitset and the mutexes of
+    a layer are stored as one bit row per item, so mutexes are found with a
+    few bitwise operations per item rather than by testing every pair.
+
+    Attributes
+    ----------
+    literal_layers, action_layers : list
+        The literal mask of each literal layer and the action mask of each
+        action layer; action_layers[k] is the parent of literal_layers[k + 1]
+
+    literal_mutexes, action_mutexes : list
+        For each layer, a dict from the number of each item with at least one
+        mutex in the layer to the mask of the items it is mutex with
+
+    levels : dict
+        The first literal layer of each literal in the graph so far, by
+        literal number, so finding the level cost of a goal is one lookup
+    """
+    def __init__(self, problem, state, serialize=True, ignore_mutexes=False):
+        """
+        Parameters
+        ----------
+        problem : PlanningProblem
+            An instance of the PlanningProblem class
+
+        state : tuple(bool)
+            An ordered sequence of True/False values indicating the literal value
+            of the corresponding fluent in problem.state_map
+
+        serialize : bool
+            Flag indicating whether to serialize non-persistence actions (see
+            PlanningGraph)
+
+        ignore_mutexes : bool
+            Flag indicating whether to skip the competing needs and inconsistent
+            support mutexes (the static mutexes are always enforced)
+        """
+        self.index = GraphIndex.of(problem)
+        self._serialize = serialize
+        self._ignore_mutexes = ignore_mutexes
+        self._is_leveled = False
+        self.goal = self.index.goal
+        literals = self.index.initial_literals(state)
+        self.levels = dict.fromkeys(bits(literals), 0)
+        self.literal_layers = [literals]
+        self.literal_mutexes = [self._negations(literals)]
+        self.action_layers = []
+        self.action_mutexes = []
+
+    def _negations(self, literals):
+        return {l: 1 << (l ^ 1) for l in bits(literals) if literals >> (l ^ 1) & 1}
+
+    def find_goal(self, goal_in):
+        """ Return the first level of the graph that holds a literal, extending
+        the graph as needed (see PlanningGraph.find_goal)
+        """
+        level = self._level(self.index.number.get(goal_in))
+        if level is None:
+            raise Exception("Cannot find goal {}".format(goal_in))
+        return level
+
+    def _level(self, l):
+        # extend the graph until literal number l appears, or it levels off
+        while True:
+            level = self.levels.get(l)
+            if level is not None or self._is_leveled or len(self.literal_layers) >= 1e6:
+                return level
+            self._extend()
+
+    def h_levelsum(self):
+        """ Calculate the level sum heuristic (see PlanningGraph.h_levelsum) """
+        return sum(self.find_goal(g) for g in self.goal)
+
+    def h_maxlevel(self):
+        """ Calculate the max level heuristic (see PlanningGraph.h_maxlevel) """
+        return max([0] + [self.find_goal(g) for g in self.goal])
+
+    def h_setlevel(self):
+        """ Calculate the set level heuristic (see PlanningGraph.h_setlevel) """
+        goals = self.index.goals
+        while True:
+            literals, mutexes = self.literal_layers[-1], self.literal_mutexes[-1]
+            if literals & goals == goals:
+                if not any(mutexes.get(g, 0) & goals for g in bits(goals)):
+                    return len(self.literal_layers) - 1
+            if self._is_leveled:
+                break
+            self._extend()
+        return len(self.literal_layers) - 1
+
+    def fill(self, maxlevels=-1):
+        """ Extend the planning graph until it is leveled, or until a specified number of
+        levels have been added
+        """
+        while not self._is_leveled:
+            if maxlevels == 0: break
+            self._extend()
+            maxlevels -= 1
+        return self
+
+    def _extend(self):
+        """ Extend the planning graph by adding both a new action layer and a new literal layer """
+        if self._is_leveled: return
+        index = self.index
+        preconditions, effects = index.preconditions, index.effects
+        parent_literals = self.literal_layers[-1]
+        parent_mutexes = self.literal_mutexes[-1]
+        actions = self.action_layers[-1] if self.action_layers else 0
+        literals = parent_literals
+        for a in range(len(index.actions)):
+            if not actions >> a & 1 and not preconditions[a] & ~parent_literals:
+                actions |= 1 << a
+                literals |= effects[a]
+
+        # action mutexes: static, serialized and competing needs
+        action_mutexes = {}
+        real = actions & ~index.no_ops
+        for a in bits(actions):
+            row = index.static_mutexes[a]
+            if self._serialize and real >> a & 1:
+                row |= real
+            if not self._ignore_mutexes:
+                needs = 0
+                for p in bits(preconditions[a]):
+                    needs |= parent_mutexes.get(p, 0)
+                for l in bits(needs):
+                    row |= index.consumers[l]
+            row &= actions & ~(1 << a)
+            if row:
+                action_mutexes[a] = row
+
+        # literal mutexes: negation and inconsistent support
+        literal_mutexes = self._negations(literals)
+        if not self._ignore_mutexes and actions:
+            # the literals some action that is not mutex with (and not the
+            # same as) an achiever of each literal could provide
+            companions = {a: actions & ~action_mutexes.get(a, 0) & ~(1 << a) for a in bits(actions)}
+            supported = {}
+            for p in bits(literals):
+                friends = 0
+                for a in bits(index.achievers[p] & actions):
+                    friends |= companions[a]
+                reach = supported.get(friends)
+                if reach is None:
+                    reach = 0
+                    for b in bits(friends):
+                        reach |= effects[b]
+                    supported[friends] = reach
+                row = literals & ~reach & ~(1 << p)
+                if row:
+                    literal_mutexes[p] = literal_mutexes.get(p, 0) | row
+
+        for l in bits(literals & ~parent_literals):
+            self.levels[l] = len(self.literal_layers)
+        self.action_layers.append(actions)
+        self.action_mutexes.append(action_mutexes)
+        self.literal_layers.append(literals)
+        self.literal_mutexes.append(literal_mutexes)
+        self._is_leveled = literals == parent_literals and literal_mutexes == parent_mutexes
@@ -3,6 +3,7 @@ from copy import deepcopy
 from functools import lru_cache
 from itertools import combinations
 from collections import defaultdict, MutableSet
+from collections.abc import Mapping
 
 from aimacode.planning import Action
 from aimacode.utils import expr, Expr
@@ -79,6 +80,73 @@ class ActionNode(object):
             and self.expr == other.expr)
 
 
+class EdgeMap(Mapping):
+    """ Copy-on-write mapping from the items of a layer to sets of nodes, used
+    for the edges of a planning graph layer
+
+    A new layer starts with all the edges of the layer it extends. Instead of
+    copying every set, copy() freezes the sets recorded so far and shares them
+    between the two maps, and each map records its later changes on its own.
+    A shared set is copied the first time it is looked up with [] (which is
+    how edges are added, e.g., parents[action] |= literals); get(), `in` and
+    iteration read the shared sets directly. Missing keys map to a new empty
+    set on [], as in a defaultdict(set).
+    """
+    def __init__(self):
+        self._own = {}
+        # dicts shared with other maps, newest first; they are never modified
+        self._shared = ()
+
+    def copy(self):
+        """ Return a map with the same edges that shares them with this one """
+        if self._own:
+            self._shared = (self._own,) + self._shared
+            self._own = {}
+        other = EdgeMap()
+        other._shared = self._shared
+        return other
+
+    def get(self, key, default=None):
+        if key in self._own:
+            return self._own[key]
+        for edges in self._shared:
+            if key in edges:
+                return edges[key]
+        return default
+
+    def __getitem__(self, key):
+        if key not in self._own:
+            self._own[key] = set(self.get(key, ()))
+        return self._own[key]
+
+    def __setitem__(self, key, value):
+        self._own[key] = value
+
+    def __contains__(self, key):
+        return key in self._own or any(key in edges for edges in self._shared)
+
+    def __iter__(self):
+        seen = set()
+        for edges in (self._own,) + self._shared:
+            for key in edges:
+                if key not in seen:
+                    seen.add(key)
+                    yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def items(self):
+        # read without copying (Mapping.items() would look the sets up with [])
+        return [(key, self.get(key)) for key in self]
+
+    def values(self):
+        return [self.get(key) for key in self]
+
+    def __repr__(self):
+        return "EdgeMap({!r})".format(dict(self.items()))
+
+
 class BaseLayer(MutableSet):
     """ Base class for ActionLayer and LiteralLayer classes for planning graphs
     that stores actions or literals as a mutable set (which enables terse,
@@ -86,13 +154,13 @@ class BaseLayer(MutableSet):
 
     Attributes
     ----------
-    parents : dict
+    parents : EdgeMap
         Mapping from each item (action or literal) in the current layer to the
         symbolic node(s) in parent layer of the planning graph. E.g.,
         parents[actionA] is a set containing the symbolic literals (positive AND
         negative) that are preconditions of the action.
 
-    children : dict
+    children : EdgeMap
         Mapping from each item (action or literal) in the current layer to the
         symbolic node(s) in the child layer of the planning graph. E.g.,
         children[actionA] is a set containing the symbolic literals (positive AND
@@ -110,6 +178,9 @@ class BaseLayer(MutableSet):
         that are mutex to the key. E.g., _mutexes[literaA] is a set of literals
         that are mutex to literalA in this level of the planning graph
 
+    mutex_count : int
+        The number of mutex pairs in the layer
+
     _ignore_mutexes : bool
         If _ignore_mutexes is True then _dynamic_ mutexes will be ignored (static
         mutexes are *always* enforced). For example, a literal X is always mutex
@@ -130,9 +201,10 @@ class BaseLayer(MutableSet):
         """
         super().__init__()
         self.__store = set(iter(items))
-        self.parents = defaultdict(set)
-        self.children = defaultdict(set)
+        self.parents = EdgeMap()
+        self.children = EdgeMap()
         self._mutexes = defaultdict(set)
+        self.mutex_count = 0
         self.parent_layer = parent_layer
         self._ignore_mutexes = ignore_mutexes
 
@@ -147,6 +219,7 @@ class BaseLayer(MutableSet):
 
     def __eq__(self, other):
         return (len(self) == len(other) and
+            self.mutex_count == other.mutex_count and
             len(self._mutexes) == len(other._mutexes) and
             0 == len(self ^ other) and self._mutexes == other._mutexes)
 
@@ -160,6 +233,8 @@ class BaseLayer(MutableSet):
             pass
 
     def set_mutex(self, itemA, itemB):
+        if itemB not in self._mutexes[itemA]:
+            self.mutex_count += 1
         self._mutexes[itemA].add(itemB)
         self._mutexes[itemB].add(itemA)
 
@@ -168,25 +243,45 @@ class BaseLayer(MutableSet):
 
 
 class BaseActionLayer(BaseLayer):
-    def __init__(self, actions=[], parent_layer=None, serialize=True, ignore_mutexes=False):
+    """ Base class for action layers
+
+    Attributes
+    ----------
+    static_mutexes : dict or None
+        Mapping from each action to the set of actions it is mutex with
+        because of inconsistent effects or interference. These relations only
+        depend on the action definitions, so the table can be computed once per
+        problem (see compiled_graph.GraphIndex.static_table) and shared by every
+        layer; pairs of actions that are not both in the table (or every pair,
+        if there is no table) are tested with _inconsistent_effects() and
+        _interference()
+    """
+    def __init__(self, actions=[], parent_layer=None, serialize=True, ignore_mutexes=False,
+                 static_mutexes=None):
         super().__init__(actions, parent_layer, ignore_mutexes)
         self._serialize=serialize
+        self.static_mutexes = static_mutexes
         if isinstance(actions, BaseActionLayer):
-            self.parents.update({k: set(v) for k, v in actions.parents.items()})
-            self.children.update({k: set(v) for k, v in actions.children.items()})
+            self.parents = actions.parents.copy()
+            self.children = actions.children.copy()
 
     def update_mutexes(self):
         for actionA, actionB in combinations(iter(self), 2):
             if self._serialize and actionA.no_op == actionB.no_op == False:
                 self.set_mutex(actionA, actionB)
-            elif (self._inconsistent_effects(actionA, actionB)
-                    or self._interference(actionA, actionB)):
+            elif self._static_mutex(actionA, actionB):
                 self.set_mutex(actionA, actionB)
             elif self._ignore_mutexes:
                 continue
             elif self._competing_needs(actionA, actionB):
                 self.set_mutex(actionA, actionB)
 
+    def _static_mutex(self, actionA, actionB):
+        table = self.static_mutexes
+        if table is not None and actionA in table and actionB in table:
+            return actionB in table[actionA]
+        return self._inconsistent_effects(actionA, actionB) or self._interference(actionA, actionB)
+
     def add_inbound_edges(self, action, literals):
         # inbound action edges are many-to-one
         self.parents[action] |= set(literals)
@@ -200,8 +295,8 @@ class BaseLiteralLayer(BaseLayer):
     def __init__(self, literals=[], parent_layer=None, ignore_mutexes=False):
         super().__init__(literals, parent_layer, ignore_mutexes)
         if isinstance(literals, BaseLiteralLayer):
-            self.parents.update({k: set(v) for k, v in literals.parents.items()})
-            self.children.update({k: set(v) for k, v in literals.children.items()})
+            self.parents = literals.parents.copy()
+            self.children = literals.children.copy()
 
     def update_mutexes(self):
         for literalA, literalB in combinations(iter(self), 2):
@@ -212,6 +307,18 @@ class BaseLiteralLayer(BaseLayer):
             elif len(self.parent_layer) and self._inconsistent_support(literalA, literalB):
                 self.set_mutex(literalA, literalB)
 
+    def is_leveled(self):
+        """ Return True if the layer is the same as the literal layer before it
+
+        A literal layer holds every literal of the literal layer before it, and
+        two literals that are mutex in the layer were mutex in the layer before
+        it, so the two layers are the same when they have as many literals and
+        as many mutex pairs.
+        """
+        previous = self.parent_layer.parent_layer
+        return (previous is not None and len(self) == len(previous)
+                and self.mutex_count == previous.mutex_count)
+
     def add_inbound_edges(self, action, literals):
         # inbound literal edges are many-to-many
         for literal in literals:
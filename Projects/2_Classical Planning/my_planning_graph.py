@@ -1,8 +1,8 @@
-from itertools import chain, combinations
 from aimacode.planning import Action
 from aimacode.utils import expr
 
-from layers import BaseActionLayer, BaseLiteralLayer, makeNoOp, make_node
+from layers import BaseActionLayer, BaseLiteralLayer
+from compiled_graph import GraphIndex
 
 
 class ActionLayer(BaseActionLayer):
@@ -75,12 +75,55 @@ class LiteralLayer(BaseLiteralLayer):
         layers.BaseLayer.parent_layer
         """
         # TODO: implement this function
-        for actionA, actionB in combinations(self.parent_layer, 2):
-            if not self.parent_layer.is_mutex(actionA, actionB):
-                if (literalA in actionA.effects and literalB in actionB.effects) or (
-                        literalA in actionB.effects and literalB in actionA.effects):
-                    return False
-        return True
+        # the literals are consistent if two different actions, one supporting
+        # each literal, are not mutex: some companion of a supporter of
+        # literalA supports literalB
+        supporters, companions = self._support_sets()
+        return not companions.get(literalA, 0) & supporters.get(literalB, 0)
+
+    # support sets of the literals, computed from the parent layer the first
+    # time they are needed by update_mutexes()
+    _support = None
+
+    def _support_sets(self):
+        """ Return the support sets of the literals in the layer as bitsets
+
+        The actions of the parent layer are numbered, and each literal gets the
+        mask of its supporting actions (from self.parents) and the mask of the
+        companions of those actions: the actions in the parent layer that are
+        neither mutex with nor the same as one of its supporters.
+
+        Returns
+        -------
+        tuple(dict, dict)
+            Mappings from each literal to its supporter mask and to its
+            companion mask
+        """
+        if self._support is None:
+            actions = self.parent_layer
+            bit = {action: 1 << i for i, action in enumerate(actions)}
+            everything = (1 << len(bit)) - 1
+            companion = {}
+            for action, b in bit.items():
+                row = 0
+                for other in actions._mutexes.get(action, ()):
+                    row |= bit.get(other, 0)
+                companion[action] = everything & ~row & ~b
+            supporters, companions = {}, {}
+            for literal, parents in self.parents.items():
+                support = friends = 0
+                for action in parents:
+                    if action in bit:
+                        support |= bit[action]
+                        friends |= companion[action]
+                supporters[literal] = support
+                companions[literal] = friends
+            self._support = supporters, companions
+        return self._support
+
+    def update_mutexes(self):
+        self._support = None
+        super().update_mutexes()
 
     def _negation(self, literalA, literalB):
         """ Return True if two literals are negations of each other """
@@ -111,9 +154,12 @@ class PlanningGraph:
         self._ignore_mutexes = ignore_mutexes
         self.goal = set(problem.goal)
 
-        # make no-op actions that persist every literal to the next layer
-        no_ops = [make_node(n, no_op=True) for n in chain(*(makeNoOp(s) for s in problem.state_map))]
-        self._actionNodes = no_ops + [make_node(a) for a in problem.actions_list]
+        # the no-op actions that persist every literal to the next layer, then
+        # the actions of the problem, made once per problem (see GraphIndex)
+        index = GraphIndex.of(problem)
+        self._actionNodes = index.actions
+        # inconsistent effects and interference, computed once per problem
+        self._static_mutexes = index.static_table
 
         # initialize the planning graph by finding the literals that are in the
         # first layer and finding the actions they they should be connected to
@@ -122,21 +168,17 @@ class PlanningGraph:
         layer.update_mutexes()
         self.literal_layers = [layer]
         self.action_layers = []
+        # the index of the first literal layer each literal appears in
+        self.first_level = dict.fromkeys(layer, 0)
 
     def find_goal(self, goal_in):
-        # first look in existing layers incase already expanded
-        for i, literal_layer in enumerate(self.literal_layers):
-            for literal in literal_layer:
-                if literal == goal_in:
-                    return i
-        # cannot find in existing layers - expand and look
-        found_goal = False
-        while not found_goal and not self._is_leveled and len(self.literal_layers) < 1e6:
+        # the first level of every literal in the layers expanded so far is
+        # recorded by _extend, so expand only while the goal is missing
+        while goal_in not in self.first_level:
+            if self._is_leveled or len(self.literal_layers) >= 1e6:
+                raise Exception("Cannot find goal {}".format(goal_in))
             self._extend()
-            for literal in self.literal_layers[-1]:
-                if literal == goal_in:
-                    return len(self.literal_layers) - 1
-        raise Exception("Cannot find goal {}".format(goal_in))
+        return self.first_level[goal_in]
 
     def h_levelsum(self):
         """ Calculate the level sum heuristic for the planning graph
@@ -263,7 +305,8 @@ class PlanningGraph:
 
         parent_literals = self.literal_layers[-1]
         parent_actions = parent_literals.parent_layer
-        action_layer = ActionLayer(parent_actions, parent_literals, self._serialize, self._ignore_mutexes)
+        action_layer = ActionLayer(parent_actions, parent_literals, self._serialize, self._ignore_mutexes,
+                                   self._static_mutexes)
         literal_layer = LiteralLayer(parent_literals, action_layer, self._ignore_mutexes)
 
         for action in self._actionNodes:
@@ -283,6 +326,9 @@ class PlanningGraph:
 
         action_layer.update_mutexes()
         literal_layer.update_mutexes()
+        for literal in literal_layer:
+            if literal not in self.first_level:
+                self.first_level[literal] = len(self.literal_layers)
         self.action_layers.append(action_layer)
         self.literal_layers.append(literal_layer)
-        self._is_leveled = literal_layer == action_layer.parent_layer
\ No newline at end of file
+        self._is_leveled = literal_layer.is_leveled()
\ No newline at end of file
@@ -1,10 +1,14 @@
 
+from collections import Counter
 from functools import lru_cache
+from itertools import compress
+from operator import itemgetter
 
 from aimacode.logic import PropKB
 from aimacode.search import Node, Problem
 
-from _utils import encode_state, decode_state
+from _utils import encode_state, pack_state, unpack_state
+from compiled_graph import CompiledPlanningGraph
 from my_planning_graph import PlanningGraph
 
     ##############################################################################
@@ -12,11 +16,141 @@ from my_planning_graph import PlanningGraph
     ##############################################################################
 
 
+class SuccessorGenerator:
+    """ An inverted index from fluents to the actions that need them, which
+    finds the actions whose preconditions hold without testing every action
+
+    Each action is filed under one of its positive preconditions, the one
+    shared by the fewest other actions, so a lookup only tests the actions
+    filed under the fluents that are True in the state. Each test is a single
+    lookup of every precondition fluent of the action (or two masks for
+    bitset states), so the cost of a lookup grows with the number of True
+    fluents and of applicable actions, rather than with the number of actions
+    times their preconditions. Actions without positive preconditions are
+    tested in every state.
+
+    Actions with preconditions on fluents outside the state map can never be
+    applied (see BasePlanningProblem.actions), and are left out.
+    """
+    def __init__(self, actions, state_map):
+        """
+        Parameters
+        ----------
+        actions : list
+            The grounded actions of the problem (aimacode.planning.Action)
+
+        state_map : list
+            The ordered fluents of the problem states
+        """
+        self.actions = list(actions)
+        size = len(state_map)
+        index = {f: idx for idx, f in enumerate(state_map)}
+        self._fluents = range(size)
+        self._by_fluent = [[] for _ in state_map]
+        self._always = []
+        shared = Counter(index[f] for a in self.actions for f in a.precond_pos if f in index)
+        for order, action in enumerate(self.actions):
+            pos = sorted(index.get(f, -1) for f in action.precond_pos)
+            neg = sorted(index.get(f, -1) for f in action.precond_neg)
+            if -1 in pos or -1 in neg or set(pos) & set(neg):
+                continue
+            # itemgetter returns a bare value rather than a tuple for one index
+            conditions = pos + neg
+            expected = tuple([True] * len(pos) + [False] * len(neg))
+            if len(conditions) == 1:
+                lookup, expected = itemgetter(conditions[0]), expected[0]
+            else:
+                lookup = itemgetter(*conditions) if conditions else (lambda state: ())
+            masks = (sum(1 << (size - 1 - idx) for idx in pos), sum(1 << (size - 1 - idx) for idx in neg))
+            entry = (order, lookup, expected) + masks
+            if pos:
+                self._by_fluent[min(pos, key=lambda idx: (shared[idx], idx))].append(entry)
+            else:
+                self._always.append(entry)
+
+    def applicable(self, state, bitset=False):
+        """ Return the actions that can be executed in a state, in the order they were given
+
+        Parameters
+        ----------
+        state : tuple(bool) or int
+            A state as a tuple of True/False values, or as an int bitset
+            (see _utils.pack_state) if `bitset` is True
+        """
+        found = []
+        if bitset:
+            size = len(self._fluents)
+            for order, _, _, pos, neg in self._always:
+                if state & pos == pos and not state & neg:
+                    found.append(order)
+            rest = state
+            while rest:
+                low = rest & -rest
+                rest ^= low
+                for order, _, _, pos, neg in self._by_fluent[size - low.bit_length()]:
+                    if state & pos == pos and not state & neg:
+                        found.append(order)
+        else:
+            for order, lookup, expected, _, _ in self._always:
+                if lookup(state) == expected:
+                    found.append(order)
+            for idx in compress(self._fluents, state):
+                for order, lookup, expected, _, _ in self._by_fluent[idx]:
+                    if lookup(state) == expected:
+                        found.append(order)
+        found.sort()
+        return [self.actions[order] for order in found]
+
+
 class BasePlanningProblem(Problem):
-    def __init__(self, initial, goal):
+    def __init__(self, initial, goal, bitset=False, compiled_graph=False):
+        """
+        Parameters
+        ----------
+        initial : FluentState
+            The initial problem state
+
+        goal : iterable
+            A collection of literal fluents describing the goal state
+
+        bitset : bool
+            Represent states as int bitsets (see _utils.pack_state) instead of
+            tuples of True/False values. The goal and the effects of every
+            action are compiled into masks the first time they are needed,
+            so that result() and goal_test() are a few bitwise operations.
+
+        compiled_graph : bool
+            Build the planning graphs of the h_pg_* heuristics with
+            compiled_graph.CompiledPlanningGraph, which stores layers and
+            mutexes as int bitsets, instead of my_planning_graph.PlanningGraph.
+            Both give the same heuristic values.
+        """
         self.state_map = sorted(initial.pos + initial.neg, key=str)
         self.initial_state_TF = encode_state(initial, self.state_map)
-        super().__init__(self.initial_state_TF, goal=goal)
+        self.bitset = bitset
+        self.planning_graph = CompiledPlanningGraph if compiled_graph else PlanningGraph
+        self._compiled = None
+        self._successors = None
+        initial_state = pack_state(self.initial_state_TF) if bitset else self.initial_state_TF
+        super().__init__(initial_state, goal=goal)
+
+    def state_tuple(self, state):
+        """ Return a state as a tuple of True/False values, whichever representation the problem uses """
+        return unpack_state(state, len(self.state_map)) if self.bitset else state
+
+    def _compile(self):
+        """ Compile the goal and the action effects into masks over the fluents
+        of a bitset state (effects outside the state map are ignored)
+        """
+        size = len(self.state_map)
+        bit = {f: 1 << (size - 1 - idx) for idx, f in enumerate(self.state_map)}
+
+        def mask(fluents):
+            return sum(bit[f] for f in set(fluents) if f in bit)
+
+        effects = {action: (mask(action.effect_add), mask(action.effect_rem)) for action in self.actions_list}
+        self._compiled = (mask(self.goal), effects)
+        return self._compiled
 
     @lru_cache()
     def h_unmet_goals(self, node):
@@ -25,6 +159,9 @@ class BasePlanningProblem(Problem):
         conditions by ignoring the preconditions required for an action to be
         executed.
         """
+        if self.bitset:
+            goal_mask = (self._compiled or self._compile())[0]
+            return bin(goal_mask & ~node.state).count('1')
         return sum(1 for i, f in enumerate(self.state_map) if not node.state[i] and f in self.goal)
 
     @lru_cache()
@@ -38,7 +175,7 @@ class BasePlanningProblem(Problem):
         --------
         Russell-Norvig 10.3.1 (3rd Edition)
         """
-        pg = PlanningGraph(self, node.state, serialize=True, ignore_mutexes=True)
+        pg = self.planning_graph(self, self.state_tuple(node.state), serialize=True, ignore_mutexes=True)
         score = pg.h_levelsum()
         return score
 
@@ -53,7 +190,7 @@ class BasePlanningProblem(Problem):
         --------
         Russell-Norvig 10.3.1 (3rd Edition)
         """
-        pg = PlanningGraph(self, node.state, serialize=True, ignore_mutexes=True)
+        pg = self.planning_graph(self, self.state_tuple(node.state), serialize=True, ignore_mutexes=True)
         score = pg.h_maxlevel()
         return score
 
@@ -67,32 +204,28 @@ class BasePlanningProblem(Problem):
         --------
         Russell-Norvig 10.3.1 (3rd Edition)
         """
-        pg = PlanningGraph(self, node.state, serialize=True)
+        pg = self.planning_graph(self, self.state_tuple(node.state), serialize=True)
         score = pg.h_setlevel()
         return score
 
     def actions(self, state):
-        """ Return the actions that can be executed in the given state. """
-        possible_actions = []
-        fluent = decode_state(state, self.state_map)
-        for action in self.actions_list:
-            is_possible = True
-            for clause in action.precond_pos:
-                if clause not in fluent.pos:
-                    is_possible = False
-                    break
-            if not is_possible: continue
-            for clause in action.precond_neg:
-                if clause not in fluent.neg:
-                    is_possible = False
-                    break
-            if is_possible: possible_actions.append(action)
-        return possible_actions
+        """ Return the actions that can be executed in the given state.
+
+        The actions are looked up in a SuccessorGenerator, built from
+        actions_list the first time this method is called, and are returned
+        in the order of actions_list.
+        """
+        if self._successors is None:
+            self._successors = SuccessorGenerator(self.actions_list, self.state_map)
+        return self._successors.applicable(state, self.bitset)
 
     def result(self, state, action):
         """ Return the state that results from executing the given action in the
         given state. The action must be one of self.actions(state).
         """
+        if self.bitset:
+            add, rem = (self._compiled or self._compile())[1][action]
+            return state & ~rem | add
         return tuple([
             (f and s not in action.effect_rem) or (s in action.effect_add)
             for f, s in zip(state, self.state_map)
@@ -100,4 +233,7 @@ class BasePlanningProblem(Problem):
 
     def goal_test(self, state: str) -> bool:
         """ Test the state to see if goal is reached """
+        if self.bitset:
+            goal_mask = (self._compiled or self._compile())[0]
+            return state & goal_mask == goal_mask
         return all(f for f, c in zip(state, self.state_map) if c in self.goal)
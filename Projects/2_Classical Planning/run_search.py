@@ -66,7 +66,7 @@ def manual():
         __file__, " ".join(p_choices), " ".join(s_choices)))
 
 
-def main(p_choices, s_choices):
+def main(p_choices, s_choices, bitset=False, compiled_graph=False):
     problems = [PROBLEMS[i-1] for i in map(int, p_choices)]
     searches = [SEARCHES[i-1] for i in map(int, s_choices)]
 
@@ -75,7 +75,7 @@ def main(p_choices, s_choices):
             hstring = heuristic if not heuristic else " with {}".format(heuristic)
             print("\nSolving {} using {}{}...".format(pname, sname, hstring))
 
-            problem_instance = problem_fn()
+            problem_instance = problem_fn(bitset, compiled_graph)
             heuristic_fn = None if not heuristic else getattr(problem_instance, heuristic)
             run_search(problem_instance, search_fn, heuristic_fn)
 
@@ -88,6 +88,10 @@ if __name__=="__main__":
                         help="Interactively select the problems and searches to run.")
     parser.add_argument('-p', '--problems', nargs="+", choices=range(1, len(PROBLEMS)+1), type=int, metavar='',
                         help="Specify the indices of the problems to solve as a list of space separated values. Choose from: {!s}".format(list(range(1, len(PROBLEMS)+1))))
+    parser.add_argument('-b', '--bitset', action="store_true",
+                        help="Represent states as int bitsets instead of tuples of True/False values.")
+    parser.add_argument('-g', '--compiled-graph', action="store_true",
+                        help="Use the compiled bitset planning graph in the planning graph heuristics.")
     parser.add_argument('-s', '--searches', nargs="+", choices=range(1, len(SEARCHES)+1), type=int, metavar='',
                         help="Specify the indices of the search algorithms to use as a list of space separated values. Choose from: {!s}".format(list(range(1, len(SEARCHES)+1))))
     args = parser.parse_args()
@@ -95,7 +99,8 @@ if __name__=="__main__":
     if args.manual:
         manual()
     elif args.problems and args.searches:
-        main(list(sorted(set(args.problems))), list(sorted(set((args.searches)))))
+        main(list(sorted(set(args.problems))), list(sorted(set((args.searches)))), args.bitset,
+             args.compiled_graph)
     else:
         print()
         parser.print_help()
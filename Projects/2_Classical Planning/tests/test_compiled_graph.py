@@ -0,0 +1,121 @@
+import unittest
+
+from itertools import combinations, islice
+
+from aimacode.utils import expr
+from example_have_cake import have_cake
+from aimacode.search import Node
+from air_cargo_problems import air_cargo_p1, air_cargo_p2, air_cargo_p3, air_cargo_p4
+from my_planning_graph import PlanningGraph, ActionLayer
+from compiled_graph import CompiledPlanningGraph, GraphIndex, bits
+from tests.test_planning_problem import reachable
+
+
+# the heuristic values of the initial states expected by tests/test_my_planning_graph.py
+EXPECTED = [(have_cake, 1, 1, 2), (air_cargo_p1, 2, 4, 4), (air_cargo_p2, 2, 6, 4),
+            (air_cargo_p3, 3, 10, 6), (air_cargo_p4, 3, 13, 6)]
+
+
+def mutex_pairs(layer):
+    return {frozenset(pair) for pair in combinations(layer, 2) if layer.is_mutex(*pair)}
+
+
+def compiled_pairs(items, rows):
+    return {frozenset((items[a], items[b])) for a, row in rows.items() for b in bits(row)}
+
+
+class TestCompiledPlanningGraph(unittest.TestCase):
+    def setUp(self):
+        self.problems = [(have_cake(), None), (air_cargo_p1(), 12)]
+
+    def states(self, problem, limit):
+        return islice(reachable(problem), 0, None, limit or 1)
+
+    def test_bits(self):
+        self.assertEqual(list(bits(0)), [])
+        self.assertEqual(list(bits(0b101001)), [0, 3, 5])
+
+    def test_index(self):
+        problem = have_cake()
+        index = GraphIndex.of(problem)
+        self.assertIs(GraphIndex.of(problem), index)
+        for l, literal in enumerate(index.literals):
+            self.assertEqual(index.literals[l ^ 1], ~literal)
+            self.assertEqual(index.number[literal], l)
+        self.assertEqual(len(index.actions), 2 * len(problem.state_map) + len(problem.actions_list))
+        for a in range(len(index.actions)):
+            self.assertFalse(index.static_mutexes[a] >> a & 1)
+
+    def test_static_table(self):
+        layer = ActionLayer()
+        for problem, _ in self.problems:
+            index = GraphIndex.of(problem)
+            for actionA in index.actions:
+                for actionB in index.actions:
+                    static = actionA != actionB and (layer._inconsistent_effects(actionA, actionB)
+                                                     or layer._interference(actionA, actionB))
+                    self.assertEqual(actionB in index.static_table[actionA], static)
+
+    def test_layers_match_planning_graph(self):
+        for problem, limit in self.problems:
+            for state in self.states(problem, limit):
+                for serialize in (True, False):
+                    for ignore_mutexes in (True, False):
+                        pg = PlanningGraph(problem, state, serialize, ignore_mutexes).fill()
+                        cg = CompiledPlanningGraph(problem, state, serialize, ignore_mutexes).fill()
+                        literals, actions = cg.index.literals, cg.index.actions
+                        self.assertEqual(len(pg.literal_layers), len(cg.literal_layers))
+                        for k, layer in enumerate(pg.literal_layers):
+                            self.assertEqual(set(layer), {literals[l] for l in bits(cg.literal_layers[k])})
+                            self.assertEqual(mutex_pairs(layer), compiled_pairs(literals, cg.literal_mutexes[k]))
+                        for k, layer in enumerate(pg.action_layers):
+                            self.assertEqual(set(layer), {actions[a] for a in bits(cg.action_layers[k])})
+                            self.assertEqual(mutex_pairs(layer), compiled_pairs(actions, cg.action_mutexes[k]))
+
+    def test_heuristics_match_planning_graph(self):
+        for problem, limit in self.problems:
+            for state in self.states(problem, limit):
+                for heuristic, ignore_mutexes in (("h_levelsum", True), ("h_maxlevel", True),
+                                                  ("h_setlevel", False), ("h_setlevel", True)):
+                    pg = PlanningGraph(problem, state, ignore_mutexes=ignore_mutexes)
+                    cg = CompiledPlanningGraph(problem, state, ignore_mutexes=ignore_mutexes)
+                    self.assertEqual(getattr(pg, heuristic)(), getattr(cg, heuristic)(), heuristic)
+
+    def test_first_levels(self):
+        for problem, limit in self.problems:
+            for state in self.states(problem, limit):
+                cg = CompiledPlanningGraph(problem, state).fill()
+                for l, literal in enumerate(cg.index.literals):
+                    layers = [k for k, layer in enumerate(cg.literal_layers) if layer >> l & 1]
+                    self.assertEqual(cg.levels.get(l), layers[0] if layers else None)
+                    if layers:
+                        self.assertEqual(cg.find_goal(literal), layers[0])
+                pg = PlanningGraph(problem, state).fill()
+                self.assertEqual(pg.first_level, {cg.index.literals[l]: k for l, k in cg.levels.items()})
+
+    def test_template_is_shared(self):
+        problem = have_cake()
+        graphs = [CompiledPlanningGraph(problem, problem.initial),
+                  CompiledPlanningGraph(problem, problem.initial, serialize=False)]
+        self.assertIs(graphs[0].index, graphs[1].index)
+        self.assertIs(PlanningGraph(problem, problem.initial)._actionNodes, graphs[0].index.actions)
+
+    def test_unreachable_goal(self):
+        problem = have_cake()
+        for graph in (PlanningGraph, CompiledPlanningGraph):
+            with self.assertRaises(Exception):
+                graph(problem, problem.initial).find_goal(expr('Have(Pie)'))
+
+
+class TestCompiledHeuristics(unittest.TestCase):
+    def test_default_graph(self):
+        self.assertIs(have_cake().planning_graph, PlanningGraph)
+        self.assertIs(have_cake(compiled_graph=True).planning_graph, CompiledPlanningGraph)
+
+    def test_expected_values(self):
+        for problem_fn, maxlevel, levelsum, setlevel in EXPECTED:
+            problem = problem_fn(compiled_graph=True)
+            node = Node(problem.initial)
+            self.assertEqual(problem.h_pg_maxlevel(node), maxlevel, problem_fn.__name__)
+            self.assertEqual(problem.h_pg_levelsum(node), levelsum, problem_fn.__name__)
+            self.assertEqual(problem.h_pg_setlevel(node), setlevel, problem_fn.__name__)
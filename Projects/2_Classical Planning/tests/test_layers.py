@@ -0,0 +1,48 @@
+import unittest
+
+from air_cargo_problems import air_cargo_p1
+from layers import EdgeMap
+from my_planning_graph import PlanningGraph
+
+
+class TestEdgeMap(unittest.TestCase):
+    def test_copy_on_write(self):
+        edges = EdgeMap()
+        edges['a'] |= {1, 2}
+        edges['b'].add(3)
+        copy = edges.copy()
+        self.assertEqual(dict(copy.items()), {'a': {1, 2}, 'b': {3}})
+        self.assertIs(copy.get('a'), edges.get('a'))
+
+        copy['a'].add(4)
+        edges['b'].add(5)
+        edges['c'].add(6)
+        self.assertEqual(dict(edges.items()), {'a': {1, 2}, 'b': {3, 5}, 'c': {6}})
+        self.assertEqual(dict(copy.items()), {'a': {1, 2, 4}, 'b': {3}})
+        self.assertNotIn('c', copy)
+        self.assertEqual(len(copy), 2)
+
+    def test_layers_share_edges(self):
+        problem = air_cargo_p1()
+        graph = PlanningGraph(problem, problem.initial, ignore_mutexes=True).fill()
+        previous = None
+        for layer in graph.literal_layers[1:]:
+            expected = {}
+            for action in layer.parent_layer:
+                for literal in action.effects:
+                    expected.setdefault(literal, set()).add(action)
+            self.assertEqual({k: v for k, v in layer.parents.items() if v}, expected)
+            if previous is not None:
+                # literals without new achievers keep the set of the layer before
+                shared = [l for l in previous.parents if layer.parents.get(l) is previous.parents.get(l)]
+                self.assertTrue(shared)
+            previous = layer
+
+    def test_leveled_by_counters(self):
+        problem = air_cargo_p1()
+        graph = PlanningGraph(problem, problem.initial).fill()
+        last = graph.literal_layers[-1]
+        self.assertTrue(last.is_leveled())
+        self.assertEqual(last, last.parent_layer.parent_layer)
+        for layer in graph.literal_layers[1:-1]:
+            self.assertFalse(layer.is_leveled())
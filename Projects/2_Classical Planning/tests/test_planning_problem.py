@@ -0,0 +1,102 @@
+import unittest
+
+from aimacode.search import breadth_first_search, astar_search, Node
+from example_have_cake import have_cake
+from air_cargo_problems import air_cargo_p1, air_cargo_p2
+from aimacode.planning import Action
+from aimacode.utils import expr
+from _utils import pack_state, unpack_state, decode_state
+from planning_problem import SuccessorGenerator
+
+
+def applicable(actions, state, state_map):
+    """ Find the applicable actions by testing every precondition of every action """
+    fluent = decode_state(state, state_map)
+    return [action for action in actions
+            if all(c in fluent.pos for c in action.precond_pos)
+            and all(c in fluent.neg for c in action.precond_neg)]
+
+
+def reachable(problem):
+    frontier, seen = [problem.initial], {problem.initial}
+    while frontier:
+        state = frontier.pop()
+        yield state
+        for action in problem.actions(state):
+            child = problem.result(state, action)
+            if child not in seen:
+                seen.add(child)
+                frontier.append(child)
+
+
+def plan(node):
+    return [(action.name, action.args) for action in node.solution()]
+
+
+class TestBitsetStates(unittest.TestCase):
+    def setUp(self):
+        self.problems = [(have_cake(), have_cake(bitset=True)),
+                         (air_cargo_p1(), air_cargo_p1(bitset=True))]
+
+    def test_pack_state(self):
+        state = (True, False, False, True, True)
+        self.assertEqual(pack_state(state), 0b10011)
+        self.assertEqual(unpack_state(pack_state(state), len(state)), state)
+        # packed states sort like the tuples they were packed from
+        states = [(False, True, True), (True, False, False), (False, False, True)]
+        self.assertEqual(sorted(states, key=pack_state), sorted(states))
+
+    def test_transitions_match_tuple_states(self):
+        for tuples, bits in self.problems:
+            self.assertEqual(bits.initial, pack_state(tuples.initial))
+            compiled = {str(action): action for action in bits.actions_list}
+            frontier, seen = [tuples.initial], {tuples.initial}
+            while frontier:
+                state = frontier.pop()
+                packed = pack_state(state)
+                self.assertEqual([str(a) for a in tuples.actions(state)],
+                                 [str(a) for a in bits.actions(packed)])
+                self.assertEqual(tuples.goal_test(state), bits.goal_test(packed))
+                self.assertEqual(tuples.h_unmet_goals(Node(state)), bits.h_unmet_goals(Node(packed)))
+                for action in tuples.actions(state):
+                    child = tuples.result(state, action)
+                    self.assertEqual(pack_state(child), bits.result(packed, compiled[str(action)]))
+                    if child not in seen:
+                        seen.add(child)
+                        frontier.append(child)
+
+    def test_search_finds_the_same_plans(self):
+        tuples, bits = air_cargo_p2(), air_cargo_p2(bitset=True)
+        self.assertEqual(plan(breadth_first_search(tuples)), plan(breadth_first_search(bits)))
+        self.assertEqual(plan(astar_search(tuples, tuples.h_unmet_goals)),
+                         plan(astar_search(bits, bits.h_unmet_goals)))
+        tuples, bits = air_cargo_p1(), air_cargo_p1(bitset=True)
+        self.assertEqual(plan(astar_search(tuples, tuples.h_pg_levelsum)),
+                         plan(astar_search(bits, bits.h_pg_levelsum)))
+
+
+class TestSuccessorGenerator(unittest.TestCase):
+    def test_matches_a_linear_scan(self):
+        for problem in (have_cake(), air_cargo_p1(), air_cargo_p2()):
+            generator = SuccessorGenerator(problem.actions_list, problem.state_map)
+            for state in reachable(problem):
+                expected = applicable(problem.actions_list, state, problem.state_map)
+                self.assertEqual(generator.applicable(state), expected)
+                self.assertEqual(generator.applicable(pack_state(state), bitset=True), expected)
+
+    def test_impossible_preconditions(self):
+        x, y, z = expr('X'), expr('Y'), expr('Z')
+        actions = [
+            Action(expr('A()'), [set([x]), set([y])], [set(), set()]),
+            Action(expr('B()'), [set([x]), set([x])], [set(), set()]),
+            Action(expr('C()'), [set([z]), set()], [set(), set()]),
+            Action(expr('D()'), [set(), set()], [set(), set()]),
+            Action(expr('E()'), [set(), set([x, y])], [set(), set()]),
+        ]
+        generator = SuccessorGenerator(actions, [x, y])
+        for state in [(a, b) for a in (False, True) for b in (False, True)]:
+            self.assertEqual(generator.applicable(state), applicable(actions, state, [x, y]))
+
+
+if __name__ == '__main__':
+    unittest.main()